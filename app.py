@@ -1,8 +1,23 @@
-from patchright.async_api import async_playwright
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from browser_pool import PRIORITY_BACKGROUND, PRIORITY_LIVE, BrowserPool
+from debug_capture import CaptureStore
+from fixture_index import FixtureIndex, normalize_fixture
+from fixture_resolver import FixtureResolver, load_aliases
+from interception import RequestInterceptor
+from jobs import Job, JobQueue, QueueFull
+from market_parser import convert_fractional_to_decimal, market_table, pair_market_lines
+from metrics import MetricsRegistry, StageTimer
+from odds_cache import OddsCache
+from odds_history import OddsHistory
+from prefetch import PrefetchScheduler, parse_schedule
+from watch import WatchLimitReached, WatchManager
 import asyncio
+from datetime import datetime, timezone
+import config
+import json
 import logging
 import re
+import time
 
 # Set up logging to show more info for debugging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -10,461 +25,857 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-def convert_fractional_to_decimal(fraction):
-    """Convert fractional odds (e.g., '5/2') to decimal odds."""
+# Blocks images, fonts, media and tracking beacons on every scraping context
+interceptor = RequestInterceptor(
+    blocked_types=config.BLOCKED_RESOURCE_TYPES,
+    blocked_patterns=config.BLOCKED_URL_PATTERNS,
+    allowed_patterns=config.ALLOWED_URL_PATTERNS,
+)
+
+# Pre-launched browser contexts shared by all requests, each with its own profile dir
+pool = BrowserPool(
+    size=config.BROWSER_POOL_SIZE,
+    data_dir=config.BROWSER_DATA_DIR,
+    max_uses=config.BROWSER_MAX_USES,
+    health_interval=config.BROWSER_HEALTH_INTERVAL,
+    launch_options={
+        "channel": "chrome",
+        "headless": config.BROWSER_HEADLESS,
+        "no_viewport": True,
+    },
+    on_launch=interceptor.install if config.INTERCEPTION_ENABLED else None,
+)
+if config.PREWARM_BROWSERS:
+    pool.start()
+
+# Match page URLs captured after a successful search, so repeat fixtures skip it
+fixture_index = FixtureIndex(
+    path=config.FIXTURE_INDEX_PATH,
+    ttl=config.FIXTURE_INDEX_TTL,
+    max_entries=config.FIXTURE_INDEX_MAX_ENTRIES,
+)
+
+# Matches fixtures to search results and learns how the site spells each team
+fixture_resolver = FixtureResolver(
+    aliases=load_aliases(config.FIXTURE_ALIASES_PATH),
+    min_score=config.FIXTURE_MATCH_MIN_SCORE,
+    max_terms=config.FIXTURE_SEARCH_ATTEMPTS,
+)
+
+# Opt-in, sampled capture of screenshots and HTML, written off the event loop
+capture_store = CaptureStore(
+    root=config.DEBUG_CAPTURE_DIR,
+    max_bytes=config.DEBUG_CAPTURE_MAX_BYTES,
+    max_requests=config.DEBUG_CAPTURE_MAX_REQUESTS,
+    sample_rate=config.DEBUG_CAPTURE_SAMPLE_RATE,
+)
+
+# Prometheus metrics served on /metrics
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram("scrapeapi_stage_seconds", "Time spent in each scrape stage", ["stage"])
+STAGE_ERRORS = metrics.counter("scrapeapi_stage_errors_total", "Scrape failures by stage", ["stage"])
+REQUEST_SECONDS = metrics.histogram("scrapeapi_request_seconds", "End-to-end request latency", ["endpoint"])
+metrics.gauge("scrapeapi_pool_slots", "Browser pool slots by state", ["state"], lambda: {
+    (state,): pool.stats()[state] for state in ("size", "idle", "leased", "alive")
+})
+metrics.gauge("scrapeapi_pool_events", "Browser launches and recycles since start", ["event"], lambda: {
+    (event,): pool.stats()[event] for event in ("launches", "recycles")
+})
+metrics.gauge("scrapeapi_cache", "Odds cache entries and lookups", ["kind"], lambda: {
+    (kind,): value for kind, value in odds_cache.stats().items()
+})
+metrics.gauge("scrapeapi_blocked_requests", "Requests blocked by the interceptor", [], lambda: {
+    (): interceptor.stats()["blocked"]
+})
+metrics.gauge("scrapeapi_job_queue_depth", "Jobs waiting in the job queue", [], lambda: {
+    (): job_queue.depth()
+})
+metrics.gauge("scrapeapi_prefetch_fixtures", "Fixtures on the prefetch watchlist", [], lambda: {
+    (): prefetcher.stats()["fixtures"]
+})
+metrics.gauge("scrapeapi_watched_fixtures", "Fixtures kept open in watch mode", [], lambda: {
+    (): len(watch_manager.sessions)
+})
+
+# Match page tabs markets can be read from
+TABS = ["Goals", "Corners/Cards"]
+
+# Parsed tab snapshots keyed by (normalized fixture, tab), shared by all requests
+odds_cache = OddsCache(ttl=config.ODDS_CACHE_TTL, max_entries=config.ODDS_CACHE_MAX_ENTRIES)
+
+# Every price change seen by a scrape or a watched page, queryable without a browser
+odds_history = OddsHistory(root=config.HISTORY_DIR, retention_days=config.HISTORY_RETENTION_DAYS)
+
+# Map the market names to what actually appears on the Bet365 site
+MARKET_MAPPING = {
+    "First Half": "1st Half Goals",
+    "Match Total": "Match Goals",
+    "First Half Asian Corners": "1st Half Asian Corners",
+    "Asian Corners": "Asian Corners",
+    "Match Corners": "Match Corners",
+    "First Half Corners": "1st Half Corners"
+}
+
+def parse_bet_type(bet_type):
+    """Work out the tab, candidate markets and threshold for a bet type like 'Match Total | Over 2.5'."""
+    # Parse the bet_type string
+    bet_parts = bet_type.split(" | ")
+    market = bet_parts[0]
+    condition = bet_parts[1] if len(bet_parts) > 1 else ""
+
+    # Determine which tab holds the market
+    is_corner_bet = "Corner" in bet_type or "Corners" in bet_type
+    tab = "Corners/Cards" if is_corner_bet else "Goals"
+
+    # Handle special case for Asian Corners
+    if "Asian Corner" in bet_type or "Asian Corners" in bet_type:
+        if "First Half" in bet_type or "1st Half" in bet_type:
+            market_name = "1st Half Asian Corners"
+        else:
+            market_name = "Asian Corners"
+    elif "Corner" in bet_type or "Corners" in bet_type:
+        if "First Half" in bet_type or "1st Half" in bet_type:
+            market_name = "1st Half Corners"
+        else:
+            market_name = "Match Corners"
+    else:
+        market_name = MARKET_MAPPING.get(market, market)
+
+    # For Match Goals/Corners, we may need to check multiple markets
+    if market_name == "Match Goals":
+        markets_to_check = ["Match Goals", "Alternative Match Goals"]
+    elif market_name == "Match Corners":
+        markets_to_check = ["Match Corners", "Alternative Match Corners"]
+    else:
+        markets_to_check = [market_name]
+
+    # Extract threshold and whether it's over/under
+    threshold_match = re.match(r"Over (\d+\.?\d*)|Under (\d+\.?\d*)", condition)
+    threshold = float(threshold_match.group(1) or threshold_match.group(2)) if threshold_match else None
+    is_over = condition.startswith("Over")
+
+    return {
+        "tab": tab,
+        "markets_to_check": markets_to_check,
+        "threshold": threshold,
+        "is_over": is_over,
+    }
+
+async def enter_search(page, search_query, timer):
+    """Type a term into the site search and submit it. Returns an error dict on failure."""
+    # Locate and interact with the search bar
     try:
-        if '/' in fraction:
-            numerator, denominator = map(float, fraction.split('/'))
-            decimal = (numerator / denominator) + 1
-            return round(decimal, 2)
-        return float(fraction)  # Handle decimal odds directly
-    except (ValueError, ZeroDivisionError):
-        return None
+        search_bar_selector = "div.wc-SearchBar_Inner"
+        await page.wait_for_selector(search_bar_selector, timeout=config.STAGE_TIMEOUTS["search_bar"])
+        search_bar = await page.query_selector(search_bar_selector)
+        await search_bar.click()
 
-async def scrape_bet365(fixture, bet_type):
-    async with async_playwright() as p:
-        browser = None
+        input_selector = "input[type='text'], input[type='search']"
         try:
-            # Launch browser with stealth configuration
-            browser = await p.chromium.launch_persistent_context(
-                user_data_dir="./browser_data",
-                channel="chrome",
-                headless=False,
-                no_viewport=True,
-            )
-
-            # Create a new page
-            page = await browser.new_page()
-
-            # Navigate to Bet365
-            url = "https://www.bet365.com"
-            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-
-            # Wait for page content
-            try:
-                await page.wait_for_selector("body", timeout=10000)
-            except Exception as e:
-                logger.error(f"Error waiting for content: {e}")
+            input_field = await page.query_selector(input_selector)
+            if input_field:
+                await input_field.click()
+                # Clear the term from an earlier attempt
+                await input_field.fill("")
+                await input_field.type(search_query, delay=100)
+            else:
+                await search_bar.type(search_query, delay=100)
+        except Exception as e:
+            logger.error(f"Error interacting with input field: {e}")
+            await search_bar.type(search_query, delay=100)
 
-            # Extract the first team from the fixture
-            search_query = fixture.split(" - ")[0]  # e.g., "FC Anyang" from "FC Anyang - FC Seoul"
+        await page.keyboard.press("Enter")
+        timer.lap("search_typing")
 
-            # Locate and interact with the search bar
-            try:
-                search_bar_selector = "div.wc-SearchBar_Inner"
-                await page.wait_for_selector(search_bar_selector, timeout=10000)
-                search_bar = await page.query_selector(search_bar_selector)
-                await search_bar.click()
-
-                input_selector = "input[type='text'], input[type='search']"
-                try:
-                    input_field = await page.query_selector(input_selector)
-                    if input_field:
-                        await input_field.click()
-                        await input_field.type(search_query, delay=100)
-                    else:
-                        await search_bar.type(search_query, delay=100)
-                except Exception as e:
-                    logger.error(f"Error interacting with input field: {e}")
-                    await search_bar.type(search_query, delay=100)
-
-                await page.keyboard.press("Enter")
+    except Exception as e:
+        logger.error(f"Error interacting with search bar: {e}")
+        return {"error": "Search bar interaction failed"}
 
-            except Exception as e:
-                logger.error(f"Error interacting with search bar: {e}")
-                await page.screenshot(path="search_error_screenshot.png")
-                return {"error": "Search bar interaction failed"}
+    return None
+
+async def click_search_result(name_element):
+    """Click through from a search result's participant name to its match page."""
+    parent = await name_element.query_selector("xpath=../..")
+    if not parent:
+        await name_element.click()
+        return
+    clickable = await parent.query_selector("a, button")
+    if clickable:
+        await clickable.click()
+        return
+    try:
+        await name_element.click()
+    except Exception as e:
+        await parent.click()
+
+async def open_match_page(page, fixture, capture, timer):
+    """Search for the fixture and click through to its match page. Returns an error dict on failure.
+
+    Search terms come from ``fixture_resolver``, which also scores every result
+    against both participants in one pass; the next term is only searched when no
+    result is the fixture.
+    """
+    name_selector = "span.ssm-SiteSearchLabelOnlyParticipant_Name"
+    previous_names = []
+    for search_query in fixture_resolver.search_terms(fixture):
+        error = await enter_search(page, search_query, timer)
+        if error:
+            timer.error("search_bar")
+            await capture.screenshot(page, "search_error_screenshot")
+            return error
+
+        # Wait for this search's results, not the ones left over from the last term
+        try:
+            await page.wait_for_function("""
+                ({selector, previous}) => {
+                    const names = Array.from(document.querySelectorAll(selector), el => el.innerText);
+                    return names.length > 0 && names.join('|') !== previous;
+                }
+            """, arg={"selector": name_selector, "previous": "|".join(previous_names)},
+                timeout=config.STAGE_TIMEOUTS["search_results"])
+        except Exception as e:
+            logger.warning(f"No new search results for '{search_query}': {e}")
+            timer.lap("result_scan")
+            continue
+
+        name_elements = await page.query_selector_all(name_selector)
+        names = await page.eval_on_selector_all(name_selector, "els => els.map(el => el.innerText)")
+        previous_names = names
+        index, score = fixture_resolver.best_candidate(fixture, names)
+        timer.lap("result_scan")
+        if index is None or index >= len(name_elements):
+            logger.info(f"No search result for '{search_query}' matches {fixture} (best score {score:.2f}): {names}")
+            continue
+        logger.info(f"Matched {fixture} to search result '{names[index]}' (score {score:.2f})")
+
+        try:
+            await click_search_result(name_elements[index])
+            # The match page is usable once its tab bar renders; networkidle never
+            # settles on a live-updating sportsbook
+            await page.wait_for_selector("div.ipe-GridHeaderTabLink", timeout=config.STAGE_TIMEOUTS["match_page"])
+            timer.lap("match_page")
+        except Exception as e:
+            logger.error(f"Error processing search results or match page: {e}")
+            timer.error("match_page")
+            await capture.screenshot(page, "results_error_screenshot")
+            return {"error": "Match page loading failed"}
+
+        return None
+
+    timer.error("match_not_found")
+    await capture.screenshot(page, "no_match_screenshot")
+    return {"error": "Match not found in search results"}
+
+async def open_indexed_match_page(page, fixture, url):
+    """Go straight to a previously captured match page URL.
+
+    Returns False (and drops the index entry) if the page doesn't turn into a match
+    page showing both participants, so the caller can fall back to searching. The
+    participants are looked for as stored with the URL, since the resolver's
+    learned spellings don't survive a restart.
+    """
+    names = fixture_index.names(fixture) or fixture_resolver.site_names(fixture)
+    teams = [team.lower() for team in names]
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=config.STAGE_TIMEOUTS["goto"])
+        await page.wait_for_function("""
+            (teams) => {
+                if (!document.querySelector('div.ipe-GridHeaderTabLink')) return false;
+                const text = document.body.innerText.toLowerCase();
+                return teams.every(team => text.includes(team));
+            }
+        """, arg=teams, timeout=config.STAGE_TIMEOUTS["match_page"])
+        logger.info(f"Opened {fixture} from fixture index: {url}")
+        return True
+    except Exception as e:
+        logger.warning(f"Indexed URL for {fixture} no longer shows the match, searching instead: {e}")
+        fixture_index.invalidate(fixture)
+        return False
+
+# Titles of the pods currently in the market grid, used to tell when a tab switch
+# has replaced them
+MARKET_SIGNATURE_JS = """
+    () => Array.from(
+        document.querySelectorAll('div.ipe-EventViewDetail_MarketGrid .sip-MarketGroupButton_Text'),
+        el => el.innerText
+    ).join('|')
+"""
+
+# Resolve true once the market grid has had no text or child changes for quietMs,
+# or false if it is still changing after timeoutMs
+MARKET_QUIET_JS = """
+    ({quietMs, timeoutMs}) => new Promise(resolve => {
+        const grid = document.querySelector('div.ipe-EventViewDetail_MarketGrid');
+        if (!grid) return resolve(false);
+        let quietTimer = null;
+        const finish = (settled) => {
+            observer.disconnect();
+            clearTimeout(quietTimer);
+            clearTimeout(deadline);
+            resolve(settled);
+        };
+        const observer = new MutationObserver(() => {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => finish(true), quietMs);
+        });
+        const deadline = setTimeout(() => finish(false), timeoutMs);
+        observer.observe(grid, {subtree: true, childList: true, characterData: true});
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    })
+"""
+
+async def wait_for_tab_switch(page, previous_signature):
+    """Wait for the grid to show a different set of pods than before the tab click."""
+    try:
+        await page.wait_for_function("""
+            (previous) => {
+                const titles = Array.from(
+                    document.querySelectorAll('div.ipe-EventViewDetail_MarketGrid .sip-MarketGroupButton_Text'),
+                    el => el.innerText
+                );
+                return titles.length > 0 && titles.join('|') !== previous;
+            }
+        """, arg=previous_signature, timeout=config.STAGE_TIMEOUTS["tab_switch"])
+    except Exception as e:
+        # The tab may already have been selected; the readiness checks still apply
+        logger.warning(f"Market grid did not change after tab click: {e}")
+
+async def wait_for_markets_ready(page):
+    """Wait until the market grid is present, its pods are populated and prices stop changing."""
+    await page.wait_for_selector("div.ipe-EventViewDetail_MarketGrid", timeout=config.STAGE_TIMEOUTS["market_grid"])
+
+    try:
+        await page.wait_for_function("""
+            () => Array.from(
+                document.querySelectorAll('div.ipe-EventViewDetail_MarketGrid div.gl-MarketGroupPod')
+            ).some(pod => pod.querySelector('.sip-MarketGroupButton_Text') && /\\d/.test(pod.innerText))
+        """, timeout=config.STAGE_TIMEOUTS["markets_populated"])
+    except Exception as e:
+        logger.warning(f"Market pods not populated in time, reading what is there: {e}")
 
-            # Wait for search results and find the target match
+    settled = await page.evaluate(MARKET_QUIET_JS, {
+        "quietMs": config.MARKET_QUIET_MS,
+        "timeoutMs": config.STAGE_TIMEOUTS["market_quiet"],
+    })
+    if not settled:
+        logger.warning("Market grid still changing, reading the current prices")
+
+async def open_tab(page, tab_to_click, capture):
+    """Switch the match page to the Goals or Corners/Cards tab. Returns an error dict on failure."""
+    try:
+        # Create a more generic tab selector that works for both Goals and Corners/Cards
+        tab_selector = f"div.ipe-GridHeaderTabLink:has-text('{tab_to_click}')"
+        await page.wait_for_selector(tab_selector, timeout=config.STAGE_TIMEOUTS["tab_link"])
+        tab = await page.query_selector(tab_selector)
+        previous_signature = await page.evaluate(MARKET_SIGNATURE_JS)
+
+        if tab:
+            logger.info(f"Found and clicking on {tab_to_click} tab")
+            await tab.click()
+            await wait_for_tab_switch(page, previous_signature)
+        else:
+            # Fallback to JavaScript if the selector doesn't work
+            logger.info(f"Using JavaScript to click on {tab_to_click} tab")
+            await page.evaluate(f"""
+                Array.from(document.querySelectorAll('div.ipe-GridHeaderTabLink')).find(
+                    el => el.textContent.includes('{tab_to_click}')
+                )?.click();
+            """)
+            await wait_for_tab_switch(page, previous_signature)
+
+    except Exception as e:
+        logger.error(f"Error clicking on {tab_to_click} tab: {e}")
+        await capture.screenshot(page, f"{tab_to_click.lower().replace('/', '_')}_tab_error_screenshot")
+        return {"error": f"{tab_to_click} tab navigation failed"}
+
+    return None
+
+# Walk the market grid once and return every pod as structured JSON. Each pod's
+# lines are scanned in the page with the same rules as market_parser.scan_pod_text:
+# numeric (or split "9.0, 9.5") lines before "Over" are thresholds, then the Over and Under columns
+# follow. The raw text is kept for the regex fallbacks in pair_market_lines.
+EXTRACT_MARKETS_JS = """
+    (options) => {
+        const grid = document.querySelector('div.ipe-EventViewDetail_MarketGrid') || document;
+        const htmlFor = new Set(options.htmlFor || []);
+        const isThreshold = /^(\\d+(?:\\.\\d+)?)(?:\\s*,\\s*(\\d+(?:\\.\\d+)?))?$/;
+        return Array.from(grid.querySelectorAll('div.gl-MarketGroupPod')).map(pod => {
+            const title = pod.querySelector('.sip-MarketGroupButton_Text')?.innerText || null;
+            const text = pod.innerText;
+            const thresholds = [], over = [], under = [];
+            let section = null;
+            for (const raw of text.split('\\n')) {
+                const line = raw.trim();
+                if (!line || line === title || line === 'BB') continue;
+                if (line === 'Over' || line === 'Under') {
+                    section = line;
+                    continue;
+                }
+                if (section === null) {
+                    // A split line such as "9.0, 9.5" is one row keyed by its midpoint
+                    const match = isThreshold.exec(line);
+                    if (match) {
+                        thresholds.push(match[2] === undefined
+                            ? parseFloat(match[1])
+                            : (parseFloat(match[1]) + parseFloat(match[2])) / 2);
+                    }
+                } else if (section === 'Over') {
+                    over.push(line);
+                } else {
+                    under.push(line);
+                }
+            }
+            return {
+                title, text, thresholds, over, under,
+                html: htmlFor.has(title) ? pod.outerHTML : null,
+            };
+        });
+    }
+"""
+
+async def read_markets(page, markets_to_check, capture, timer):
+    """Parse every market on the current tab.
+
+    All pods are pulled out of the page in a single ``page.evaluate`` call; the rest
+    is lookups in the returned JSON. Returns ``(market_data, market_titles)`` where
+    ``market_data`` maps each market title to its ``parsed_data`` and ``thresholds``.
+    ``markets_to_check`` only controls which markets are logged and captured in detail.
+    """
+    # Wait for the market grid to load and settle
+    await wait_for_markets_ready(page)
+    timer.lap("market_ready")
+
+    # Pod HTML is only pulled out of the page when it is going to be captured
+    html_for = markets_to_check if capture.enabled else []
+    pods = await page.evaluate(EXTRACT_MARKETS_JS, {"htmlFor": html_for})
+    market_titles = [pod["title"] for pod in pods if pod["title"]]
+    logger.info(f"Found {len(pods)} market pods")
+    logger.info(f"Available markets: {market_titles}")
+
+    market_data = {}
+    for pod in pods:
+        market_name = pod["title"]
+        # Keep the first pod for a title, matching the old top-to-bottom search
+        if not market_name or market_name in market_data:
+            continue
+
+        if market_name in markets_to_check:
+            logger.info(f"Found target market: {market_name}")
+            logger.debug(f"Market content from {market_name}: {pod['text']}")
+
+            # Also keep the text and HTML structure to help with parsing
+            capture.text(f"{market_name.replace(' ', '_')}_content.txt", pod["text"])
+            capture.text(f"{market_name.replace(' ', '_')}_structure.html", pod["html"])
+
+            logger.debug(f"Thresholds: {pod['thresholds']}")
+            logger.debug(f"Over odds: {pod['over']}")
+            logger.debug(f"Under odds: {pod['under']}")
+
+        parsed_data = pair_market_lines(pod["thresholds"], pod["over"], pod["under"], pod["text"])
+        market_data[market_name] = {
+            "parsed_data": parsed_data,
+            "thresholds": list(parsed_data.keys())
+        }
+        if market_name in markets_to_check:
+            logger.debug(f"Parsed data from {market_name}: {parsed_data}")
+
+    timer.lap("market_parse")
+    return market_data, market_titles
+
+def resolve_bet(fixture, bet_type, bet, market_data, market_titles):
+    """Pick the exact (or closest) threshold for a bet from parsed market data."""
+    threshold = bet["threshold"]
+
+    # Only consider the markets this bet type can be priced from
+    market_data = {name: market_data[name] for name in bet["markets_to_check"] if name in market_data}
+
+    # If no markets found after checking all options
+    if not market_data:
+        # Return an error with available markets for debugging
+        return {
+            "error": f"No markets found. Available markets: {', '.join(market_titles)}",
+            "fixture": fixture,
+            "bet_type": bet_type
+        }
+
+    # Look for the exact threshold across all markets
+    exact_match_market = None
+    for market_name, market_info in market_data.items():
+        if threshold in market_info["parsed_data"]:
+            exact_match_market = market_name
+            break
+
+    # If found an exact match
+    if exact_match_market:
+        parsed_data = market_data[exact_match_market]["parsed_data"]
+        over_odds = parsed_data[threshold].get("Over", "N/A")
+        under_odds = parsed_data[threshold].get("Under", "N/A")
+
+        over_decimal = convert_fractional_to_decimal(over_odds) if over_odds and over_odds != "N/A" else None
+        under_decimal = convert_fractional_to_decimal(under_odds) if under_odds and under_odds != "N/A" else None
+
+        over_decimal_str = f"({over_decimal})" if over_decimal else "(N/A)"
+        under_decimal_str = f"({under_decimal})" if under_decimal else "(N/A)"
+
+        return {
+            "fixture": fixture,
+            "bet_type": bet_type,
+            "market_used": exact_match_market,
+            "odds": f"{threshold} {over_odds} {over_decimal_str} | {under_odds} {under_decimal_str}"
+        }
+    # If no exact match, find the closest threshold
+    else:
+        best_market = None
+        closest_threshold = None
+        smallest_diff = float('inf')
+
+        # Find the market with the closest threshold
+        for market_name, market_info in market_data.items():
+            if not market_info["thresholds"]:
+                continue
+
+            current_closest = min(market_info["thresholds"], key=lambda x: abs(x - threshold))
+            current_diff = abs(current_closest - threshold)
+
+            if current_diff < smallest_diff:
+                smallest_diff = current_diff
+                closest_threshold = current_closest
+                best_market = market_name
+
+        if best_market:
+            parsed_data = market_data[best_market]["parsed_data"]
+            over_odds = parsed_data[closest_threshold].get("Over", "N/A")
+            under_odds = parsed_data[closest_threshold].get("Under", "N/A")
+
+            over_decimal = convert_fractional_to_decimal(over_odds) if over_odds and over_odds != "N/A" else None
+            under_decimal = convert_fractional_to_decimal(under_odds) if under_odds and under_odds != "N/A" else None
+
+            over_decimal_str = f"({over_decimal})" if over_decimal else "(N/A)"
+            under_decimal_str = f"({under_decimal})" if under_decimal else "(N/A)"
+
+            return {
+                "fixture": fixture,
+                "bet_type": bet_type,
+                "market_used": best_market,
+                "note": f"Exact threshold {threshold} not found. Using closest: {closest_threshold}",
+                "odds": f"{closest_threshold} {over_odds} {over_decimal_str} | {under_odds} {under_decimal_str}"
+            }
+        else:
+            # No usable data found in any market
+            return {
+                "error": f"No odds found for {bet_type} with threshold {threshold} in any available market",
+                "fixture": fixture,
+                "bet_type": bet_type
+            }
+
+async def navigate_to_match(page, fixture, capture, timer):
+    """Get the page onto the fixture's match page, from the fixture index when possible.
+
+    Returns an error dict on failure.
+    """
+    # Use the match URL from an earlier visit when we have one
+    indexed_url = fixture_index.get(fixture)
+    opened = indexed_url and await open_indexed_match_page(page, fixture, indexed_url)
+    if indexed_url:
+        timer.lap("indexed_goto")
+    if opened:
+        return None
+
+    # Navigate to Bet365
+    url = config.BET365_URL
+    await page.goto(url, wait_until="domcontentloaded", timeout=config.STAGE_TIMEOUTS["goto"])
+
+    # Wait for page content
+    try:
+        await page.wait_for_selector("body", timeout=config.STAGE_TIMEOUTS["body"])
+    except Exception as e:
+        logger.error(f"Error waiting for content: {e}")
+    timer.lap("goto")
+
+    error = await open_match_page(page, fixture, capture, timer)
+    if error:
+        return error
+
+    # Remember where the search took us, and how the site names the teams, for next time
+    if page.url.rstrip("/") != url.rstrip("/"):
+        fixture_index.put(fixture, page.url, fixture_resolver.site_names(fixture))
+    return None
+
+async def scrape_tabs(fixture, tab_markets, capture, timer, priority=PRIORITY_LIVE):
+    """Visit the fixture's match page once and read every market on the given tabs.
+
+    ``tab_markets`` maps each tab to the markets the caller is after. Returns
+    ``{tab: snapshot}`` where a snapshot is ``{"markets", "titles"}`` on success or
+    ``{"error": {...}}`` on failure. Must run on the pool loop (see `pool.run`).
+    """
+    timer.reset()
+    try:
+        async with pool.lease(priority) as context:
+            page = None
             try:
-                await page.wait_for_selector("span.ssm-SiteSearchLabelOnlyParticipant_Name", timeout=15000)
-                name_selector = "span.ssm-SiteSearchLabelOnlyParticipant_Name"
-                name_elements = await page.query_selector_all(name_selector)
+                # Open a fresh tab in the warm browser context
+                page = await context.new_page()
+                timer.lap("lease")
+
+                error = await navigate_to_match(page, fixture, capture, timer)
+                if error:
+                    return {tab: {"error": error} for tab in tab_markets}
+
+                snapshots = {}
+                for tab_to_click, markets_to_check in tab_markets.items():
+                    error = await open_tab(page, tab_to_click, capture)
+                    timer.lap("tab_click")
+                    if error:
+                        timer.error("tab_navigation")
+                        snapshots[tab_to_click] = {"error": error}
+                        continue
 
-                found = False
-                for name_element in name_elements:
+                    logger.info(f"Looking for markets on {tab_to_click} tab: {markets_to_check}")
                     try:
-                        name_text = await name_element.inner_text()
-                        if search_query in name_text and " v " in name_text:
-                            parent = await name_element.query_selector("xpath=../..")
-                            if parent:
-                                clickable = await parent.query_selector("a, button")
-                                if clickable:
-                                    await clickable.click()
-                                    found = True
-                                    break
-                                else:
-                                    try:
-                                        await name_element.click()
-                                        found = True
-                                        break
-                                    except Exception as e:
-                                        await parent.click()
-                                        found = True
-                                        break
+                        market_data, market_titles = await read_markets(page, markets_to_check, capture, timer)
                     except Exception as e:
-                        logger.error(f"Error processing name element: {e}")
-
-                if not found:
-                    await page.screenshot(path="no_match_screenshot.png")
-                    return {"error": "Match not found in search results"}
-
-                await page.wait_for_load_state("networkidle", timeout=10000)
-
-                # Determine which tab to click based on bet_type
-                is_corner_bet = "Corner" in bet_type or "Corners" in bet_type
-                tab_to_click = "Corners/Cards" if is_corner_bet else "Goals"
-                
-                try:
-                    # Create a more generic tab selector that works for both Goals and Corners/Cards
-                    tab_selector = f"div.ipe-GridHeaderTabLink:has-text('{tab_to_click}')"
-                    await page.wait_for_selector(tab_selector, timeout=15000)
-                    tab = await page.query_selector(tab_selector)
-                    
-                    if tab:
-                        logger.info(f"Found and clicking on {tab_to_click} tab")
-                        await tab.click()
-                        await page.wait_for_timeout(5000)
-                    else:
-                        # Fallback to JavaScript if the selector doesn't work
-                        logger.info(f"Using JavaScript to click on {tab_to_click} tab")
-                        await page.evaluate(f"""
-                            Array.from(document.querySelectorAll('div.ipe-GridHeaderTabLink')).find(
-                                el => el.textContent.includes('{tab_to_click}')
-                            )?.click();
-                        """)
-                        await page.wait_for_timeout(5000)
-
-                except Exception as e:
-                    logger.error(f"Error clicking on {tab_to_click} tab: {e}")
-                    await page.screenshot(path=f"{tab_to_click.lower().replace('/', '_')}_tab_error_screenshot.png")
-                    return {"error": f"{tab_to_click} tab navigation failed"}
+                        logger.error(f"Error scraping markets: {e}")
+                        timer.error("market_scrape")
+                        await capture.screenshot(page, "markets_error_screenshot")
+                        await capture.page_html(page, "markets_error")
+                        snapshots[tab_to_click] = {"error": {"error": f"Market scraping failed: {str(e)}"}}
+                        continue
+
+                    if markets_to_check and not any(market_name in market_data for market_name in markets_to_check):
+                        # Take a screenshot for debugging
+                        timer.error("no_markets")
+                        await capture.screenshot(page, "market_search_screenshot")
+
+                    snapshots[tab_to_click] = {"markets": market_data, "titles": market_titles}
+
+                return snapshots
 
             except Exception as e:
-                logger.error(f"Error processing search results or match page: {e}")
-                await page.screenshot(path="results_error_screenshot.png")
-                return {"error": "Match page loading failed"}
+                logger.error(f"An error occurred: {e}")
+                timer.error("general")
+                return {tab: {"error": {"error": f"General scraping error: {str(e)}"}} for tab in tab_markets}
+            finally:
+                if page:
+                    timer.reset()
+                    await page.close()
+                    timer.lap("teardown")
+    except Exception as e:
+        # Leasing itself failed, e.g. the browser could not be relaunched
+        logger.error(f"Could not get a browser for {fixture}: {e}")
+        timer.error("lease")
+        return {tab: {"error": {"error": f"General scraping error: {str(e)}"}} for tab in tab_markets}
 
-            try:
-                # Wait for market grid to load
-                await page.wait_for_selector("div.ipe-EventViewDetail_MarketGrid", timeout=10000)
-                
-                # Parse the bet_type string
-                bet_parts = bet_type.split(" | ")
-                market = bet_parts[0]
-                condition = bet_parts[1] if len(bet_parts) > 1 else ""
-                
-                # Map the market names to what actually appears on the Bet365 site
-                market_mapping = {
-                    "First Half": "1st Half Goals",
-                    "Match Total": "Match Goals",
-                    "First Half Asian Corners": "1st Half Asian Corners",
-                    "Asian Corners": "Asian Corners",
-                    "Match Corners": "Match Corners",
-                    "First Half Corners": "1st Half Corners"
+def record_history(fixture, markets):
+    """Add ``{market: parsed_data}`` to ``odds_history`` as decimal prices."""
+    try:
+        odds_history.record(fixture, {
+            market: {
+                threshold: {
+                    "Over": convert_fractional_to_decimal(prices["Over"]) if prices.get("Over") else None,
+                    "Under": convert_fractional_to_decimal(prices["Under"]) if prices.get("Under") else None,
                 }
-                
-                # Handle special case for Asian Corners
-                if "Asian Corner" in bet_type or "Asian Corners" in bet_type:
-                    if "First Half" in bet_type or "1st Half" in bet_type:
-                        market_name = "1st Half Asian Corners"
-                    else:
-                        market_name = "Asian Corners"
-                elif "Corner" in bet_type or "Corners" in bet_type:
-                    if "First Half" in bet_type or "1st Half" in bet_type:
-                        market_name = "1st Half Corners"
-                    else:
-                        market_name = "Match Corners"
-                else:
-                    market_name = market_mapping.get(market, market)
-                
-                # For Match Goals/Corners, we may need to check multiple markets
-                markets_to_check = []
-                if market_name == "Match Goals":
-                    markets_to_check = ["Match Goals", "Alternative Match Goals"]
-                elif market_name == "Match Corners":
-                    markets_to_check = ["Match Corners", "Alternative Match Corners"]
-                else:
-                    markets_to_check = [market_name]
-                
-                # Extract threshold and whether it's over/under
-                threshold_match = re.match(r"Over (\d+\.?\d*)|Under (\d+\.?\d*)", condition)
-                threshold = float(threshold_match.group(1) or threshold_match.group(2)) if threshold_match else None
-                is_over = condition.startswith("Over")
-                
-                logger.info(f"Looking for markets: {markets_to_check}, threshold: {threshold}, is_over: {is_over}")
-                
-                # Get all market pods on the page
-                market_pods = await page.query_selector_all("div.gl-MarketGroupPod")
-                
-                logger.info(f"Found {len(market_pods)} market pods")
-                
-                # Get all market titles for debugging
-                market_titles = await page.evaluate("""
-                    () => {
-                        const titles = [];
-                        document.querySelectorAll('.sip-MarketGroupButton_Text').forEach(el => {
-                            titles.push(el.innerText);
-                        });
-                        return titles;
-                    }
-                """)
-                logger.info(f"Available markets: {market_titles}")
-                
-                # Look through each market in our priority list to find the best match
-                # We'll collect data from each market that we find
-                market_data = {}
-                
-                for current_market in markets_to_check:
-                    # First try using the pod objects
-                    current_target_market = None
-                    
-                    for pod in market_pods:
-                        pod_title = await pod.evaluate("el => el.querySelector('.sip-MarketGroupButton_Text')?.innerText")
-                        if pod_title and pod_title == current_market:
-                            current_target_market = pod
-                            logger.info(f"Found target market: {current_market}")
-                            break
-                    
-                    # If not found with objects, try JavaScript evaluation
-                    if not current_target_market:
-                        current_target_handle = await page.evaluate_handle(f"""
-                            () => {{
-                                const marketTitle = "{current_market}";
-                                const titleEls = Array.from(document.querySelectorAll('.sip-MarketGroupButton_Text'));
-                                const marketEl = titleEls.find(el => el.innerText === marketTitle);
-                                return marketEl ? marketEl.closest('.gl-MarketGroupPod') : null;
-                            }}
-                        """)
-                        
-                        if current_target_handle and not await current_target_handle.evaluate("el => el === null"):
-                            current_target_market = current_target_handle
-                            logger.info(f"Found target market with JavaScript: {current_market}")
-                    
-                    # If we found this market, process its odds data
-                    if current_target_market:
-                        # Process this market and store its data
-                        market_data[current_market] = {
-                            "market_pod": current_target_market,
-                            "parsed_data": {},  # Will be filled with threshold data
-                            "thresholds": []    # Will be filled with available thresholds
-                        }
-                
-                # If no markets found after checking all options
-                if not market_data:
-                    # Take a screenshot for debugging
-                    await page.screenshot(path=f"market_search_screenshot.png")
-                    
-                    # Return an error with available markets for debugging
-                    return {
-                        "error": f"No markets found. Available markets: {', '.join(market_titles)}",
-                        "fixture": fixture,
-                        "bet_type": bet_type
-                    }
+                for threshold, prices in parsed_data.items()
+            }
+            for market, parsed_data in markets.items()
+        })
+    except Exception as e:
+        logger.error(f"Failed to record odds history for {fixture}: {e}")
 
-                # Process each market we found
-                for market_name, market_info in market_data.items():
-                    target_market = market_info["market_pod"]
-                    
-                    # Extract the market content and structure
-                    market_content = await target_market.evaluate("el => el.innerText")
-                    logger.info(f"Market content from {market_name}: {market_content}")
-                    
-                    # Also get the HTML structure to help with parsing
-                    market_html = await target_market.evaluate("el => el.outerHTML")
-                    with open(f"{market_name.replace(' ', '_')}_structure.html", "w", encoding="utf-8") as f:
-                        f.write(market_html)
-
-                    # Parse and format the content
-                    lines = [line.strip() for line in market_content.split('\n') if line.strip()]
-                    logger.info(f"Raw lines: {lines}")
-                    
-                    # Initialize variables for parsing
-                    parsed_data = {}
-                    thresholds = []
-                    over_odds = []
-                    under_odds = []
-                    current_section = None
-                    
-                    # First pass: extract thresholds, identify over/under sections
-                    for i, line in enumerate(lines):
-                        # Skip the market name and BB lines
-                        if line == market_name or line == "BB" or line == " ":
-                            continue
-                        
-                        # Check if this line is "Over" or "Under" to mark the section
-                        if line == "Over":
-                            current_section = "Over"
-                            continue
-                        elif line == "Under":
-                            current_section = "Under"
-                            continue
-                        
-                        # If we're not in a section yet, this might be a threshold value
-                        if current_section is None:
-                            try:
-                                val = float(line)
-                                thresholds.append(val)
-                            except ValueError:
-                                pass
-                        # If we're in the "Over" section, collect odds
-                        elif current_section == "Over":
-                            over_odds.append(line)
-                        # If we're in the "Under" section, collect odds
-                        elif current_section == "Under":
-                            under_odds.append(line)
-                    
-                    logger.info(f"Thresholds: {thresholds}")
-                    logger.info(f"Over odds: {over_odds}")
-                    logger.info(f"Under odds: {under_odds}")
-                    
-                    # Try multiple parsing approaches to handle different market layouts
-                    # Approach 1: Direct mapping if counts align
-                    if len(thresholds) == len(over_odds) == len(under_odds):
-                        for i in range(len(thresholds)):
-                            parsed_data[thresholds[i]] = {"Over": over_odds[i], "Under": under_odds[i]}
-                    
-                    # Approach 2: Handle different lengths but maintain order
-                    elif len(thresholds) == len(over_odds) and len(under_odds) > 0:
-                        for i in range(len(thresholds)):
-                            parsed_data[thresholds[i]] = {
-                                "Over": over_odds[i] if i < len(over_odds) else None,
-                                "Under": under_odds[i] if i < len(under_odds) else None
-                            }
-                    
-                    # Approach 3: Look for pattern matches in the content
-                    else:
-                        # Try to match threshold with over/under odds directly from content
-                        pattern = r"(\d+\.?\d*)\s+([0-9/.]+)\s+([0-9/.]+)"
-                        matches = re.findall(pattern, market_content)
-                        
-                        if matches:
-                            logger.info(f"Found pattern matches: {matches}")
-                            for match in matches:
-                                try:
-                                    thresh = float(match[0])
-                                    parsed_data[thresh] = {"Over": match[1], "Under": match[2]}
-                                except (ValueError, IndexError):
-                                    pass
-                        
-                        # If still no data, try another pattern approach
-                        if not parsed_data:
-                            over_sections = re.findall(r"Over\s+([\d.]+)\s+([0-9/.]+)", market_content)
-                            under_sections = re.findall(r"Under\s+([\d.]+)\s+([0-9/.]+)", market_content)
-                            
-                            logger.info(f"Over sections: {over_sections}")
-                            logger.info(f"Under sections: {under_sections}")
-                            
-                            # Combine the data from both patterns
-                            for section in over_sections:
-                                try:
-                                    thresh = float(section[0])
-                                    if thresh not in parsed_data:
-                                        parsed_data[thresh] = {"Over": section[1], "Under": None}
-                                    else:
-                                        parsed_data[thresh]["Over"] = section[1]
-                                except (ValueError, IndexError):
-                                    pass
-                                    
-                            for section in under_sections:
-                                try:
-                                    thresh = float(section[0])
-                                    if thresh not in parsed_data:
-                                        parsed_data[thresh] = {"Over": None, "Under": section[1]}
-                                    else:
-                                        parsed_data[thresh]["Under"] = section[1]
-                                except (ValueError, IndexError):
-                                    pass
-                    
-                    # Store the parsed data and thresholds in our market info
-                    market_info["parsed_data"] = parsed_data
-                    market_info["thresholds"] = list(parsed_data.keys())
-                    logger.info(f"Parsed data from {market_name}: {parsed_data}")
-                
-                # Look for the exact threshold across all markets
-                exact_match_market = None
-                for market_name, market_info in market_data.items():
-                    if threshold in market_info["parsed_data"]:
-                        exact_match_market = market_name
-                        break
-                
-                # If found an exact match
-                if exact_match_market:
-                    parsed_data = market_data[exact_match_market]["parsed_data"]
-                    over_odds = parsed_data[threshold].get("Over", "N/A")
-                    under_odds = parsed_data[threshold].get("Under", "N/A")
-                    
-                    over_decimal = convert_fractional_to_decimal(over_odds) if over_odds and over_odds != "N/A" else None
-                    under_decimal = convert_fractional_to_decimal(under_odds) if under_odds and under_odds != "N/A" else None
-                    
-                    over_decimal_str = f"({over_decimal})" if over_decimal else "(N/A)"
-                    under_decimal_str = f"({under_decimal})" if under_decimal else "(N/A)"
-                    
-                    return {
-                        "fixture": fixture,
-                        "bet_type": bet_type,
-                        "market_used": exact_match_market,
-                        "odds": f"{threshold} {over_odds} {over_decimal_str} | {under_odds} {under_decimal_str}"
-                    }
-                # If no exact match, find the closest threshold
-                else:
-                    best_market = None
-                    closest_threshold = None
-                    smallest_diff = float('inf')
-                    
-                    # Find the market with the closest threshold
-                    for market_name, market_info in market_data.items():
-                        if not market_info["thresholds"]:
-                            continue
-                            
-                        current_closest = min(market_info["thresholds"], key=lambda x: abs(x - threshold))
-                        current_diff = abs(current_closest - threshold)
-                        
-                        if current_diff < smallest_diff:
-                            smallest_diff = current_diff
-                            closest_threshold = current_closest
-                            best_market = market_name
-                    
-                    if best_market:
-                        parsed_data = market_data[best_market]["parsed_data"]
-                        over_odds = parsed_data[closest_threshold].get("Over", "N/A")
-                        under_odds = parsed_data[closest_threshold].get("Under", "N/A")
-                        
-                        over_decimal = convert_fractional_to_decimal(over_odds) if over_odds and over_odds != "N/A" else None
-                        under_decimal = convert_fractional_to_decimal(under_odds) if under_odds and under_odds != "N/A" else None
-                        
-                        over_decimal_str = f"({over_decimal})" if over_decimal else "(N/A)"
-                        under_decimal_str = f"({under_decimal})" if under_decimal else "(N/A)"
-                        
-                        return {
-                            "fixture": fixture,
-                            "bet_type": bet_type,
-                            "market_used": best_market,
-                            "note": f"Exact threshold {threshold} not found. Using closest: {closest_threshold}",
-                            "odds": f"{closest_threshold} {over_odds} {over_decimal_str} | {under_odds} {under_decimal_str}"
-                        }
-                    else:
-                        # No usable data found in any market
-                        return {
-                            "error": f"No odds found for {bet_type} with threshold {threshold} in any available market",
-                            "fixture": fixture,
-                            "bet_type": bet_type
-                        }
+async def fetch_tab_snapshots(fixture, tab_markets, capture, timer, max_age=None,
+                              priority=PRIORITY_LIVE, ttl=None):
+    """Get tab snapshots from ``odds_cache``, scraping all missing tabs in one visit.
+
+    Tab snapshots are reused when fresh (no older than ``max_age`` seconds if given),
+    and concurrent misses for the same tab share one scrape. New snapshots are
+    cached for ``ttl`` seconds if given. Returns ``{tab: (snapshot, age)}``. Must
+    run on the pool loop (see `pool.run`).
+    """
+    fixture_key = normalize_fixture(fixture)
 
+    async def load(keys):
+        tabs = {tab: tab_markets[tab] for _, tab in keys}
+        snapshots = await scrape_tabs(fixture, tabs, capture, timer, priority=priority)
+        for snapshot in snapshots.values():
+            if "error" not in snapshot:
+                record_history(fixture, {name: info["parsed_data"] for name, info in snapshot["markets"].items()})
+        return {(fixture_key, tab): snapshot for tab, snapshot in snapshots.items()}
+
+    snapshots = await odds_cache.fetch_many(
+        [(fixture_key, tab) for tab in tab_markets],
+        load,
+        max_age=max_age,
+        cacheable=lambda snapshot: "error" not in snapshot,
+        ttl=ttl,
+    )
+    return {tab: snapshots[(fixture_key, tab)] for tab in tab_markets}
+
+async def scrape_bet365_batch(fixture, bet_types, capture, timer, max_age=None):
+    """Price several bet types for one fixture from a single match page visit.
+
+    Bets are grouped by the tab they live on so each tab is opened once, and every
+    market on that tab is parsed from the same DOM (see `fetch_tab_snapshots`).
+    Returns ``{bet_type: result}``. Must run on the pool loop (see `pool.run`).
+    """
+    bets = {bet_type: parse_bet_type(bet_type) for bet_type in bet_types}
+
+    # Group the bets by the tab they need so each tab is only opened once
+    tabs = {}
+    for bet_type, bet in bets.items():
+        tabs.setdefault(bet["tab"], []).append(bet_type)
+
+    # Every market needed by each tab's bets, in priority order
+    tab_markets = {}
+    for tab, tab_bet_types in tabs.items():
+        markets_to_check = tab_markets.setdefault(tab, [])
+        for bet_type in tab_bet_types:
+            for market_name in bets[bet_type]["markets_to_check"]:
+                if market_name not in markets_to_check:
+                    markets_to_check.append(market_name)
+
+    snapshots = await fetch_tab_snapshots(fixture, tab_markets, capture, timer, max_age=max_age)
+
+    results = {}
+    for tab, tab_bet_types in tabs.items():
+        snapshot, age = snapshots[tab]
+        for bet_type in tab_bet_types:
+            if "error" in snapshot:
+                results[bet_type] = dict(snapshot["error"])
+                continue
+            try:
+                results[bet_type] = resolve_bet(fixture, bet_type, bets[bet_type], snapshot["markets"], snapshot["titles"])
             except Exception as e:
-                logger.error(f"Error scraping markets: {e}")
-                await page.screenshot(path="markets_error_screenshot.png")
-                html = await page.content()
-                with open("markets_error.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                return {"error": f"Market scraping failed: {str(e)}"}
+                logger.error(f"Error resolving {bet_type}: {e}")
+                results[bet_type] = {"error": f"Market scraping failed: {str(e)}"}
+                continue
+            # Seconds since the markets were scraped, so callers can judge freshness
+            results[bet_type]["cache_age"] = round(age, 1)
 
-        except Exception as e:
-            logger.error(f"An error occurred: {e}")
-            return {"error": f"General scraping error: {str(e)}"}
-        finally:
-            if browser:
-                await browser.close()
+    return results
+
+async def scrape_markets(fixture, tabs, capture, timer, max_age=None):
+    """Return every parsed market on the given tabs as numeric tables.
+
+    Must run on the pool loop (see `pool.run`).
+    """
+    snapshots = await fetch_tab_snapshots(fixture, {tab: [] for tab in tabs}, capture, timer, max_age=max_age)
+
+    results = {}
+    for tab, (snapshot, age) in snapshots.items():
+        if "error" in snapshot:
+            results[tab] = dict(snapshot["error"])
+            continue
+        results[tab] = {
+            "cache_age": round(age, 1),
+            "markets": {name: market_table(info["parsed_data"]) for name, info in snapshot["markets"].items()},
+        }
+    return results
+
+async def scrape_bet365(fixture, bet_type, capture, timer, max_age=None):
+    """Scrape odds for one bet type. Must run on the pool loop (see `pool.run`)."""
+    results = await scrape_bet365_batch(fixture, [bet_type], capture, timer, max_age=max_age)
+    return results[bet_type]
+
+async def run_job(job):
+    """Job queue worker body. Runs on the pool loop."""
+    return await scrape_bet365_batch(
+        job.fixture, job.bet_types, capture_store.start(), new_stage_timer(), max_age=job.max_age
+    )
+
+# Submitted scrapes worked off in the background, at most one per browser slot
+job_queue = JobQueue(
+    pool,
+    run_job,
+    max_depth=config.JOB_QUEUE_MAX_DEPTH,
+    workers=config.JOB_WORKERS,
+    retention=config.JOB_RETENTION,
+)
+
+async def open_watch_page(page, fixture, tab):
+    """Bring a pinned watch page to the fixture's tab with its markets loaded."""
+    capture = capture_store.start()
+    timer = new_stage_timer()
+    error = await navigate_to_match(page, fixture, capture, timer) or await open_tab(page, tab, capture)
+    if error:
+        return error
+    await wait_for_markets_ready(page)
+    return None
+
+def cache_watched_markets(fixture, tab, markets):
+    """Feed watched page updates into ``odds_cache`` (so polling skips the scrape) and ``odds_history``.
+
+    Called on every change and periodically while the page is live, which keeps
+    the cache entry fresh for as long as the fixture is watched.
+    """
+    odds_cache.put((normalize_fixture(fixture), tab), {
+        "markets": {
+            title: {"parsed_data": parsed_data, "thresholds": list(parsed_data.keys())}
+            for title, parsed_data in markets.items()
+        },
+        "titles": list(markets),
+    })
+    record_history(fixture, markets)
+
+# Fixtures kept open on pinned pages, pushing market changes to subscribers
+watch_manager = WatchManager(
+    pool,
+    open_watch_page,
+    EXTRACT_MARKETS_JS,
+    tabs=TABS,
+    max_fixtures=config.WATCH_MAX_FIXTURES,
+    debounce_ms=config.WATCH_DEBOUNCE_MS,
+    idle_timeout=config.WATCH_IDLE_TIMEOUT,
+    buffer=config.WATCH_SUBSCRIBER_BUFFER,
+    retry_backoff=config.WATCH_RETRY_BACKOFF,
+    max_failures=config.WATCH_MAX_FAILURES,
+    max_listeners=config.WATCH_MAX_LISTENERS,
+    on_update=cache_watched_markets,
+    id_prefix=f"{config.WORKER_ID}-" if config.WORKER_ID else "",
+)
+
+async def prefetch_fixture(fixture, interval):
+    """Prefetch scheduler body: re-scrape every tab at background priority.
+
+    The snapshots are kept until the next refresh lands, but requests are only
+    served them while they are within their ``max_age`` (``ODDS_DEFAULT_MAX_AGE``
+    unless the caller asks for older). Runs on the pool loop.
+    """
+    snapshots = await fetch_tab_snapshots(
+        fixture, {tab: [] for tab in TABS}, capture_store.start(), new_stage_timer(),
+        max_age=0, priority=PRIORITY_BACKGROUND, ttl=interval + config.ODDS_CACHE_TTL,
+    )
+    return all("error" not in snapshot for snapshot, _ in snapshots.values())
+
+# Watchlisted fixtures re-scraped ahead of demand on idle browser slots
+prefetcher = PrefetchScheduler(
+    pool,
+    prefetch_fixture,
+    schedule=parse_schedule(config.PREFETCH_SCHEDULE),
+    concurrency=config.PREFETCH_CONCURRENCY,
+    inplay_window=config.PREFETCH_INPLAY_WINDOW,
+)
+
+def new_stage_timer():
+    return StageTimer(STAGE_SECONDS, STAGE_ERRORS)
+
+def finish_request(response, endpoint, timer, data):
+    """Record request latency and attach the stage breakdown if the caller asked for it."""
+    timings = timer.breakdown()
+    REQUEST_SECONDS.observe(timings["total"], endpoint)
+    if data.get('timings'):
+        response["timings"] = timings
+
+def parse_max_age(data):
+    """The request's ``max_age`` in seconds, ``ODDS_DEFAULT_MAX_AGE`` if not given.
+
+    Raises ValueError unless it is a non-negative number.
+    """
+    max_age = data.get('max_age')
+    if max_age is None:
+        return config.ODDS_DEFAULT_MAX_AGE
+    max_age = float(max_age)
+    if not max_age >= 0:
+        raise ValueError("max_age must not be negative")
+    return max_age
 
 @app.route('/get-odds', methods=['POST'])
 async def get_odds():
@@ -474,5 +885,263 @@ async def get_odds():
 
     fixture = data['fixture']
     bet_type = data['bet_type']
-    result = await scrape_bet365(fixture, bet_type)
+    try:
+        max_age = parse_max_age(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_age must be a non-negative number"}), 400
+    capture = capture_store.start(requested=data.get('debug'))
+    timer = new_stage_timer()
+    result = await pool.run(scrape_bet365(fixture, bet_type, capture, timer, max_age=max_age))
+    if capture.enabled:
+        result["debug_id"] = capture.request_id
+    finish_request(result, "get_odds", timer, data)
     return jsonify(result)
+
+@app.route('/get-odds/batch', methods=['POST'])
+async def get_odds_batch():
+    data = request.get_json()
+    if not data or 'fixture' not in data or not isinstance(data.get('bet_types'), list) or not data['bet_types']:
+        return jsonify({"error": "Missing fixture or bet_types"}), 400
+    if not all(isinstance(bet_type, str) for bet_type in data['bet_types']):
+        return jsonify({"error": "bet_types must be a list of strings"}), 400
+
+    fixture = data['fixture']
+    bet_types = data['bet_types']
+    try:
+        max_age = parse_max_age(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_age must be a non-negative number"}), 400
+    capture = capture_store.start(requested=data.get('debug'))
+    timer = new_stage_timer()
+    results = await pool.run(scrape_bet365_batch(fixture, bet_types, capture, timer, max_age=max_age))
+    response = {"fixture": fixture, "results": results}
+    if capture.enabled:
+        response["debug_id"] = capture.request_id
+    finish_request(response, "get_odds_batch", timer, data)
+    return jsonify(response)
+
+@app.route('/markets', methods=['POST'])
+async def get_markets():
+    data = request.get_json()
+    if not data or 'fixture' not in data:
+        return jsonify({"error": "Missing fixture"}), 400
+
+    tabs = data.get('tabs', TABS)
+    if not isinstance(tabs, list) or not tabs or any(tab not in TABS for tab in tabs):
+        return jsonify({"error": f"tabs must be a list drawn from {TABS}"}), 400
+
+    fixture = data['fixture']
+    try:
+        max_age = parse_max_age(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_age must be a non-negative number"}), 400
+    capture = capture_store.start(requested=data.get('debug'))
+    timer = new_stage_timer()
+    results = await pool.run(scrape_markets(fixture, tabs, capture, timer, max_age=max_age))
+    response = {"fixture": fixture, "tabs": results}
+    if capture.enabled:
+        response["debug_id"] = capture.request_id
+    finish_request(response, "markets", timer, data)
+    return jsonify(response)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+    if not data or 'fixture' not in data or ('bet_type' not in data and not data.get('bet_types')):
+        return jsonify({"error": "Missing fixture or bet_type(s)"}), 400
+
+    bet_types = data.get('bet_types') or [data['bet_type']]
+    if not isinstance(bet_types, list) or not all(isinstance(bet_type, str) for bet_type in bet_types):
+        return jsonify({"error": "bet_types must be a list of strings"}), 400
+    try:
+        priority = int(data.get('priority', 0))
+        deadline = time.time() + float(data.get('deadline', config.JOB_DEFAULT_DEADLINE))
+    except (TypeError, ValueError):
+        return jsonify({"error": "priority and deadline must be numbers"}), 400
+    try:
+        max_age = parse_max_age(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_age must be a non-negative number"}), 400
+
+    job = Job(
+        data['fixture'],
+        bet_types,
+        priority=priority,
+        deadline=deadline,
+        callback_url=data.get('callback_url'),
+        max_age=max_age,
+        id_prefix=f"{config.WORKER_ID}-" if config.WORKER_ID else "",
+    )
+    try:
+        job_queue.submit(job)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify(job.to_dict()), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/watch', methods=['POST'])
+def watch():
+    data = request.get_json()
+    if not data or 'fixture' not in data:
+        return jsonify({"error": "Missing fixture"}), 400
+
+    tabs = data.get('tabs', TABS)
+    if not isinstance(tabs, list) or not tabs or any(tab not in TABS for tab in tabs):
+        return jsonify({"error": f"tabs must be a list drawn from {TABS}"}), 400
+    try:
+        subscription = watch_manager.subscribe(data['fixture'], tabs)
+    except WatchLimitReached as e:
+        return jsonify({"error": str(e)}), 429
+
+    response = subscription.to_dict()
+    response["events"] = f"/watch/{subscription.id}/events"
+    return jsonify(response), 201
+
+@app.route('/watch/<subscription_id>/events', methods=['GET'])
+def watch_events(subscription_id):
+    subscription = watch_manager.get(subscription_id)
+    if subscription is None:
+        return jsonify({"error": "Unknown subscription id"}), 404
+    try:
+        listener = watch_manager.listen(subscription, config.WATCH_KEEPALIVE)
+    except WatchLimitReached as e:
+        return jsonify({"error": str(e)}), 429
+
+    def stream():
+        try:
+            for event in listener:
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            listener.close()
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.route('/watch/<subscription_id>', methods=['DELETE'])
+def unwatch(subscription_id):
+    if not watch_manager.unsubscribe(subscription_id):
+        return jsonify({"error": "Unknown subscription id"}), 404
+    return jsonify({"subscription_id": subscription_id, "status": "unsubscribed"})
+
+def parse_time(value):
+    """Unix seconds or an ISO 8601 string (UTC unless it has an offset) to Unix seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def history_query(data):
+    """Validate the fixture/market/threshold shared by the history endpoints."""
+    if not data or 'fixture' not in data or 'market' not in data:
+        raise ValueError("Missing fixture or market")
+    threshold = data.get('threshold')
+    if threshold is not None:
+        threshold = float(threshold)
+    return data['fixture'], MARKET_MAPPING.get(data['market'], data['market']), threshold
+
+def history_rows(prices):
+    return [dict(threshold=threshold, **observation) for threshold, observation in prices.items()]
+
+@app.route('/history/latest', methods=['POST'])
+def history_latest():
+    data = request.get_json()
+    try:
+        fixture, market, threshold = history_query(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    prices = odds_history.latest(fixture, market, threshold)
+    return jsonify({"fixture": fixture, "market": market, "prices": history_rows(prices)})
+
+@app.route('/history/at', methods=['POST'])
+def history_at():
+    data = request.get_json()
+    try:
+        fixture, market, threshold = history_query(data)
+        at = parse_time(data['time'])
+    except KeyError:
+        return jsonify({"error": "Missing time"}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    prices = odds_history.at(fixture, market, at, threshold)
+    return jsonify({"fixture": fixture, "market": market, "time": at, "prices": history_rows(prices)})
+
+@app.route('/history/movement', methods=['POST'])
+def history_movement():
+    data = request.get_json()
+    try:
+        fixture, market, threshold = history_query(data)
+        end = parse_time(data['end']) if 'end' in data else time.time()
+        start = parse_time(data['start']) if 'start' in data else end - float(data.get('window', 3600))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    movement = odds_history.movement(fixture, market, start, end, threshold)
+    return jsonify({
+        "fixture": fixture,
+        "market": market,
+        "start": start,
+        "end": end,
+        "thresholds": history_rows(movement),
+    })
+
+@app.route('/watchlist', methods=['POST'])
+def add_to_watchlist():
+    data = request.get_json()
+    if not data or 'fixture' not in data or 'kickoff' not in data:
+        return jsonify({"error": "Missing fixture or kickoff"}), 400
+    try:
+        kickoff = parse_time(data['kickoff'])
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid kickoff: {e}"}), 400
+    entry = prefetcher.add(data['fixture'], kickoff)
+    return jsonify(entry.to_dict()), 201
+
+@app.route('/watchlist', methods=['DELETE'])
+def remove_from_watchlist():
+    data = request.get_json()
+    if not data or 'fixture' not in data:
+        return jsonify({"error": "Missing fixture"}), 400
+    if not prefetcher.remove(data['fixture']):
+        return jsonify({"error": "Fixture is not on the watchlist"}), 404
+    return jsonify({"fixture": data['fixture'], "status": "removed"})
+
+@app.route('/watchlist', methods=['GET'])
+def get_watchlist():
+    return jsonify({"fixtures": prefetcher.watchlist()})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "pool": pool.stats(),
+        "cache": odds_cache.stats(),
+        "interception": interceptor.stats(),
+        "jobs": job_queue.stats(),
+        "watch": watch_manager.stats(),
+        "history": odds_history.stats(),
+        "prefetch": prefetcher.stats(),
+        "resolver": fixture_resolver.stats(),
+    })
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    pool.start()
+    stats = pool.stats()
+    # Still launching counts as healthy; once started, at least one browser must be alive
+    healthy = not pool.startup_error and (not pool.ready() or stats["alive"] > 0)
+    response = {"ready": pool.ready(), "alive": stats["alive"]}
+    if pool.startup_error:
+        response["error"] = pool.startup_error
+    return jsonify(response), 200 if healthy else 503
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
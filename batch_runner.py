@@ -0,0 +1,188 @@
+"""Stream fixture/bet_type records through the scraper and write results as JSONL.
+
+    python batch_runner.py sweep.jsonl --output results.jsonl --checkpoint sweep.done
+    cat sweep.jsonl | python batch_runner.py - > results.jsonl
+
+Each input line is {"fixture": ..., "bet_type": ...} with an optional "id" (the
+line number is used otherwise). Records are grouped by fixture within a bounded
+window so one page visit prices several bet types, groups run concurrently on the
+browser pool, and every result is written as soon as its group finishes. With
+--checkpoint, ids of successful records are appended to the checkpoint file and
+skipped on the next run; failed records are retried.
+"""
+from collections import OrderedDict
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+
+import config
+from fixture_index import normalize_fixture
+
+logger = logging.getLogger(__name__)
+
+
+def read_records(stream, done):
+    """Yield ``(id, record)`` per input line, skipping ids already in ``done``.
+
+    Unparseable lines yield ``(id, None)``.
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        if not isinstance(record, dict) or "fixture" not in record or "bet_type" not in record:
+            yield record.get("id", line_number) if isinstance(record, dict) else line_number, None
+            continue
+        record_id = record.get("id", line_number)
+        if str(record_id) not in done:
+            yield record_id, record
+
+
+def group_records(records, window, group_size, on_invalid):
+    """Group streamed records by fixture, holding at most ``window`` records at once.
+
+    Yields ``(fixture, [(id, bet_type), ...])``. A group is released when it reaches
+    ``group_size`` bet types, when the window overflows (oldest group first), or at
+    the end of the input.
+    """
+    groups = OrderedDict()  # normalized fixture -> (fixture, items)
+    buffered = 0
+    for record_id, record in records:
+        if record is None:
+            on_invalid(record_id)
+            continue
+        fixture = record["fixture"]
+        key = normalize_fixture(fixture)
+        _, items = groups.setdefault(key, (fixture, []))
+        items.append((record_id, record["bet_type"]))
+        buffered += 1
+
+        if len(items) >= group_size:
+            del groups[key]
+            buffered -= len(items)
+            yield fixture, items
+        while buffered > window:
+            _, (oldest_fixture, oldest_items) = groups.popitem(last=False)
+            buffered -= len(oldest_items)
+            yield oldest_fixture, oldest_items
+
+    for fixture, items in groups.values():
+        yield fixture, items
+
+
+class BatchRunner:
+    """Runs fixture groups on the browser pool loop and streams results out."""
+
+    def __init__(self, app, output, checkpoint=None, concurrency=2, max_age=None):
+        self.app = app
+        self.output = output
+        self.checkpoint = checkpoint
+        self.max_age = max_age
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+
+    def submit(self, fixture, items):
+        """Schedule a fixture group, blocking while ``concurrency`` groups are running."""
+        self.slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(self._run_group(fixture, items), self.app.pool.loop)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    def wait(self):
+        """Block until every submitted group has finished."""
+        for _ in range(self.concurrency):
+            self.slots.acquire()
+        for _ in range(self.concurrency):
+            self.slots.release()
+
+    def invalid(self, record_id):
+        self._emit({"id": record_id, "error": "Invalid record, expected fixture and bet_type"}, ok=False)
+
+    async def _run_group(self, fixture, items):
+        bet_types = list(dict.fromkeys(bet_type for _, bet_type in items))
+        try:
+            results = await self.app.scrape_bet365_batch(
+                fixture, bet_types, self.app.capture_store.start(), self.app.new_stage_timer(),
+                max_age=self.max_age,
+            )
+        except Exception as e:
+            logger.error(f"Batch group for {fixture} failed: {e}")
+            results = {bet_type: {"error": f"General scraping error: {str(e)}"} for bet_type in bet_types}
+
+        for record_id, bet_type in items:
+            result = results[bet_type]
+            self._emit({"id": record_id, "fixture": fixture, "bet_type": bet_type, "result": result},
+                       ok="error" not in result)
+
+    def _emit(self, record, ok):
+        with self.lock:
+            self.output.write(json.dumps(record) + "\n")
+            self.output.flush()
+            if ok:
+                self.succeeded += 1
+                if self.checkpoint:
+                    self.checkpoint.write(f"{record['id']}\n")
+                    self.checkpoint.flush()
+            else:
+                self.failed += 1
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL file of {fixture, bet_type} records, or - for stdin")
+    parser.add_argument("--output", help="JSONL results file (appended to); default stdout")
+    parser.add_argument("--checkpoint", help="file of completed record ids for resuming")
+    parser.add_argument("--concurrency", type=int, default=config.BROWSER_POOL_SIZE,
+                        help="fixture groups scraped at once")
+    parser.add_argument("--window", type=int, default=500, help="records buffered while grouping by fixture")
+    parser.add_argument("--group-size", type=int, default=20, help="max bet types per page visit")
+    parser.add_argument("--max-age", type=float, default=config.ODDS_DEFAULT_MAX_AGE,
+                        help="accept cached markets up to this many seconds old")
+    args = parser.parse_args()
+
+    # Imported here so --help doesn't launch browsers
+    import app
+
+    done = load_checkpoint(args.checkpoint) if args.checkpoint else set()
+    if done:
+        logger.info(f"Resuming: skipping {len(done)} completed records")
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    checkpoint = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint else None
+
+    app.pool.start()
+    runner = BatchRunner(app, output, checkpoint, concurrency=args.concurrency, max_age=args.max_age)
+    try:
+        groups = group_records(read_records(input_stream, done), args.window, args.group_size, runner.invalid)
+        for fixture, items in groups:
+            runner.submit(fixture, items)
+        runner.wait()
+    finally:
+        for stream in (input_stream, output, checkpoint):
+            if stream not in (None, sys.stdin, sys.stdout):
+                stream.close()
+    logger.info(f"Batch finished: {runner.succeeded} succeeded, {runner.failed} failed")
+    sys.exit(1 if runner.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
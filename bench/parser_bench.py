@@ -0,0 +1,58 @@
+"""Check the market parser against the pod corpus and time it.
+
+    python -m bench.parser_bench --repeat 2000
+
+Every corpus case must parse to its ``expected`` rows; mismatches are listed and
+the script exits non-zero. Timings are per pod, per corpus case.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from market_parser import parse_pod_html, parse_pod_text
+
+CORPUS = os.path.join(os.path.dirname(__file__), "parser_corpus", "pods.json")
+
+
+def parse_case(case):
+    if "html" in case:
+        return parse_pod_html(case["html"])[1]
+    return parse_pod_text(case["text"], case["title"])
+
+
+def rows(parsed):
+    return [[threshold, parsed[threshold]["Over"], parsed[threshold]["Under"]] for threshold in sorted(parsed)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=2000, help="parses per case when timing")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+
+    failures = 0
+    total_seconds = 0.0
+    print(f"{'case':<32} {'rows':>4} {'us/pod':>8}  result")
+    for case in cases:
+        actual = rows(parse_case(case))
+        ok = actual == case["expected"]
+        failures += not ok
+        seconds = timeit.timeit(lambda: parse_case(case), number=args.repeat)
+        total_seconds += seconds
+        print(f"{case['name']:<32} {len(actual):>4} {seconds / args.repeat * 1e6:>8.1f}  {'ok' if ok else 'MISMATCH'}")
+        if not ok:
+            print(f"    expected {case['expected']}")
+            print(f"    actual   {actual}")
+
+    pods = len(cases) * args.repeat
+    print(f"\n{len(cases)} cases, {failures} mismatches, {pods / total_seconds:,.0f} pods/s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
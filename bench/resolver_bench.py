@@ -0,0 +1,50 @@
+"""Check the fixture resolver against the search result corpus and time it.
+
+    python -m bench.resolver_bench --repeat 2000
+
+Every corpus case must pick its ``expected`` result index (null: no result
+matches); mismatches are listed and the script exits non-zero. Timings are per
+result list, per corpus case.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from fixture_resolver import FixtureResolver
+
+CORPUS = os.path.join(os.path.dirname(__file__), "resolver_corpus", "fixtures.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=2000, help="resolutions per case when timing")
+    parser.add_argument("--min-score", type=float, default=0.8)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+
+    failures = 0
+    total_seconds = 0.0
+    print(f"{'case':<32} {'pick':>4} {'score':>6} {'us/case':>8}  result")
+    for case in cases:
+        resolver = FixtureResolver(min_score=args.min_score)
+        index, score = resolver.best_candidate(case["fixture"], case["results"])
+        ok = index == case["expected"]
+        failures += not ok
+        seconds = timeit.timeit(lambda: resolver.best_candidate(case["fixture"], case["results"]), number=args.repeat)
+        total_seconds += seconds
+        print(f"{case['name']:<32} {str(index):>4} {score:>6.2f} {seconds / args.repeat * 1e6:>8.1f}  {'ok' if ok else 'MISMATCH'}")
+        if not ok:
+            print(f"    expected {case['expected']} for {case['fixture']!r} in {case['results']}")
+
+    resolutions = len(cases) * args.repeat
+    print(f"\n{len(cases)} cases, {failures} mismatches, {resolutions / total_seconds:,.0f} resolutions/s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark the scraper and HTTP endpoint against the local stand-in sportsbook.
+
+    python -m bench.run_bench --mode both --concurrency 1,2,4 --requests 20
+
+Runs entirely offline: a stand-in site is started in-process and the scraper is
+pointed at it through BET365_URL. Reports p50/p95 latency and requests per second
+for each concurrency level.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+from bench.standin_site import StandinSite, default_layout
+
+BET_TYPES = [
+    "Match Total | Over 2.5",
+    "First Half | Over 0.5",
+    "Asian Corners | Over 9.5",
+    "Match Corners | Under 10.5",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(mode, concurrency, latencies, errors, elapsed):
+    n = len(latencies)
+    print(
+        f"{mode:<8} c={concurrency:<3} n={n:<5} "
+        f"p50={percentile(latencies, 50):7.3f}s p95={percentile(latencies, 95):7.3f}s "
+        f"rps={n / elapsed if elapsed else 0:7.2f} errors={errors}"
+    )
+
+
+def workload(fixtures, requests):
+    """Round-robin over fixtures and bet types so identical requests don't coalesce."""
+    pairs = itertools.cycle((fixture, bet_type) for bet_type in BET_TYPES for fixture in fixtures)
+    return [next(pairs) for _ in range(requests)]
+
+
+def bench_scraper(app, fixtures, levels, requests):
+    """Call scrape_bet365 directly on the browser pool loop."""
+
+    async def one(fixture, bet_type, semaphore, latencies, errors):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await app.scrape_bet365(
+                fixture, bet_type, app.capture_store.start(), app.new_stage_timer(), max_age=0
+            )
+            latencies.append(time.perf_counter() - started)
+            if "error" in result:
+                errors.append(result["error"])
+
+    async def level(concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            one(fixture, bet_type, semaphore, latencies, errors)
+            for fixture, bet_type in workload(fixtures, requests)
+        ))
+        return latencies, errors, time.perf_counter() - started
+
+    for concurrency in levels:
+        latencies, errors, elapsed = app.pool.run_sync(level(concurrency))
+        report("scraper", concurrency, latencies, len(errors), elapsed)
+
+
+def bench_http(app_url, fixtures, levels, requests):
+    """POST to /get-odds from a thread pool."""
+
+    def one(pair):
+        fixture, bet_type = pair
+        body = json.dumps({"fixture": fixture, "bet_type": bet_type, "max_age": 0}).encode("utf-8")
+        req = urllib.request.Request(
+            f"{app_url}/get-odds", data=body, headers={"Content-Type": "application/json"}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=300) as response:
+                ok = "error" not in json.loads(response.read())
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    for concurrency in levels:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(one, workload(fixtures, requests)))
+        elapsed = time.perf_counter() - started
+        report("http", concurrency, [r[0] for r in results], sum(1 for r in results if not r[1]), elapsed)
+
+
+def serve_app(app):
+    """Run the Flask app on a free local port in a background thread."""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["scraper", "http", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,2,4", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="requests per concurrency level")
+    parser.add_argument("--fixtures", type=int, default=10)
+    parser.add_argument("--layout", help="JSON market layout for the stand-in site")
+    parser.add_argument("--app-url", help="benchmark an already running app instead of an in-process one")
+    parser.add_argument("--search-latency", type=int, default=300)
+    parser.add_argument("--match-latency", type=int, default=300)
+    parser.add_argument("--tab-latency", type=int, default=200)
+    parser.add_argument("--tick-interval", type=int, default=0)
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if args.layout:
+        with open(args.layout, encoding="utf-8") as f:
+            layout = json.load(f)
+    else:
+        layout = default_layout(args.fixtures)
+    site = StandinSite(
+        layout=layout, search_latency=args.search_latency, match_latency=args.match_latency,
+        tab_latency=args.tab_latency, tick_interval=args.tick_interval,
+    )
+    site_url = site.start()
+    fixtures = site.fixtures()
+    print(f"Stand-in site on {site_url} ({len(fixtures)} fixtures)")
+
+    if args.app_url:
+        # The external app must already be pointed at the stand-in via BET365_URL
+        bench_http(args.app_url.rstrip("/"), fixtures, levels, args.requests)
+        return
+
+    # Configure the in-process app before it is imported
+    workdir = tempfile.mkdtemp(prefix="scrapeapi-bench-")
+    os.environ["BET365_URL"] = site_url
+    os.environ.setdefault("BROWSER_POOL_SIZE", str(max(levels)))
+    os.environ.setdefault("BROWSER_DATA_DIR", os.path.join(workdir, "browser_data"))
+    os.environ.setdefault("FIXTURE_INDEX_PATH", os.path.join(workdir, "fixture_index.json"))
+    os.environ.setdefault("DEBUG_CAPTURE_DIR", os.path.join(workdir, "debug_captures"))
+    os.environ.setdefault("HISTORY_DIR", os.path.join(workdir, "odds_history"))
+    import app
+
+    # Wait for the pool to warm up so launch cost isn't counted
+    app.pool.run_sync(app.pool.wait_ready())
+
+    if args.mode in ("scraper", "both"):
+        bench_scraper(app, fixtures, levels, args.requests)
+    if args.mode in ("http", "both"):
+        app_url, server = serve_app(app)
+        try:
+            bench_http(app_url, fixtures, levels, args.requests)
+        finally:
+            server.shutdown()
+
+    app.pool.stop()
+    site.stop()
+
+
+if __name__ == "__main__":
+    main()
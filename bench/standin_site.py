@@ -0,0 +1,288 @@
+"""Local stand-in for the sportsbook, reproducing the DOM the scraper relies on.
+
+Serves a single-page app with the search bar, search results, match page tabs and
+market pods used by app.py, with configurable latencies and market layouts.
+
+    python -m bench.standin_site --port 8365 --search-latency 300
+    BET365_URL=http://127.0.0.1:8365 hypercorn app:app
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import threading
+import time
+
+TEAMS = [
+    "FC Anyang", "FC Seoul", "Ulsan Hyundai", "Jeonbuk Motors", "Pohang Steelers",
+    "Daegu FC", "Gangwon FC", "Suwon FC", "Arsenal", "Chelsea", "Liverpool",
+    "Everton", "Real Betis", "Sevilla", "Atletico Madrid", "Valencia", "Ajax",
+    "Feyenoord", "PSV Eindhoven", "AZ Alkmaar",
+]
+
+PRICES = ["1/5", "2/7", "1/3", "4/9", "1/2", "8/13", "4/6", "8/11", "4/5", "5/6",
+          "10/11", "1/1", "11/10", "6/5", "5/4", "11/8", "6/4", "13/8", "7/4", "2/1",
+          "9/4", "5/2", "11/4", "3/1", "10/3", "4/1", "9/2", "5/1"]
+
+
+def _lines(rng, thresholds):
+    rows = []
+    for threshold in thresholds:
+        i = rng.randrange(4, len(PRICES) - 4)
+        rows.append([threshold, PRICES[i], PRICES[len(PRICES) - 1 - i]])
+    return rows
+
+
+def default_layout(fixtures=10, seed=365):
+    """Build a deterministic layout of fixtures with Goals and Corners/Cards markets."""
+    rng = random.Random(seed)
+    teams = TEAMS[:]
+    rng.shuffle(teams)
+    layout = {"fixtures": []}
+    for i in range(fixtures):
+        home = teams[(2 * i) % len(teams)]
+        away = teams[(2 * i + 1) % len(teams)]
+        layout["fixtures"].append({
+            "home": home,
+            "away": away,
+            "tabs": {
+                "Goals": [
+                    {"title": "Match Goals", "lines": _lines(rng, [2.5])},
+                    {"title": "Alternative Match Goals", "lines": _lines(rng, [0.5, 1.5, 3.5, 4.5, 5.5])},
+                    {"title": "1st Half Goals", "lines": _lines(rng, [0.5, 1.5])},
+                ],
+                "Corners/Cards": [
+                    {"title": "Match Corners", "lines": _lines(rng, [9.5])},
+                    {"title": "Alternative Match Corners", "lines": _lines(rng, [7.5, 8.5, 10.5, 11.5])},
+                    {"title": "Asian Corners", "lines": _lines(rng, [8.5, 9.5, 10.5])},
+                    {"title": "1st Half Asian Corners", "lines": _lines(rng, [3.5, 4.5])},
+                    {"title": "1st Half Corners", "lines": _lines(rng, [4.5])},
+                ],
+            },
+        })
+    return layout
+
+
+PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Stand-in sportsbook</title>
+<style>
+  body { font-family: sans-serif; }
+  .gl-MarketGroupPod { border: 1px solid #ccc; margin: 8px 0; padding: 4px; }
+  .gl-MarketGroup_Wrapper { display: flex; gap: 16px; }
+  .ipe-GridHeaderTabLink { display: inline-block; padding: 4px 8px; cursor: pointer; }
+  .ipe-GridHeaderTabLink-selected { font-weight: bold; }
+</style>
+</head>
+<body>
+<div id="app"></div>
+<script>
+const CONFIG = __CONFIG__;
+const app = document.getElementById('app');
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+let ticker = null;
+
+function el(tag, className, text) {
+  const node = document.createElement(tag);
+  if (className) node.className = className;
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+function renderHome() {
+  app.innerHTML = '';
+  const bar = el('div', 'wc-SearchBar_Inner');
+  const input = el('input');
+  input.type = 'search';
+  bar.appendChild(input);
+  app.appendChild(bar);
+  const results = el('div', 'ssm-SiteSearchResults');
+  app.appendChild(results);
+
+  input.addEventListener('keydown', async event => {
+    if (event.key !== 'Enter') return;
+    const query = input.value.toLowerCase();
+    await sleep(CONFIG.searchLatency);
+    results.innerHTML = '';
+    CONFIG.layout.fixtures.forEach((fixture, i) => {
+      const name = `${fixture.home} v ${fixture.away}`;
+      if (!name.toLowerCase().includes(query)) return;
+      const row = el('div', 'ssm-SiteSearchLabelOnlyParticipant');
+      const label = el('div', 'ssm-SiteSearchLabelOnlyParticipant_Label');
+      label.appendChild(el('span', 'ssm-SiteSearchLabelOnlyParticipant_Name', name));
+      row.appendChild(label);
+      const link = el('a', 'ssm-SiteSearchLabelOnlyParticipant_Link', 'View');
+      link.href = `#/match/${i}`;
+      row.appendChild(link);
+      results.appendChild(row);
+    });
+  });
+}
+
+function renderPod(market) {
+  const pod = el('div', 'gl-MarketGroupPod');
+  pod.appendChild(el('div', 'sip-MarketGroupButton_Text', market.title));
+  const wrapper = el('div', 'gl-MarketGroup_Wrapper');
+  const columns = [el('div', 'gl-Market'), el('div', 'gl-Market'), el('div', 'gl-Market')];
+  columns[1].appendChild(el('div', 'gl-MarketColumnHeader', 'Over'));
+  columns[2].appendChild(el('div', 'gl-MarketColumnHeader', 'Under'));
+  for (const [threshold, over, under] of market.lines) {
+    columns[0].appendChild(el('div', 'srb-ParticipantLabelCentered_Name', String(threshold)));
+    columns[1].appendChild(el('div', 'gl-ParticipantOddsOnly_Odds', over));
+    columns[2].appendChild(el('div', 'gl-ParticipantOddsOnly_Odds', under));
+  }
+  columns.forEach(column => wrapper.appendChild(column));
+  pod.appendChild(wrapper);
+  return pod;
+}
+
+async function selectTab(fixture, grid, tabs, name) {
+  tabs.forEach(tab => tab.classList.toggle('ipe-GridHeaderTabLink-selected', tab.textContent === name));
+  await sleep(CONFIG.tabLatency);
+  grid.innerHTML = '';
+  const markets = name === 'Popular'
+    ? [{title: 'Full Time Result', lines: [[1, '6/4', '7/4']]}]
+    : fixture.tabs[name] || [];
+  markets.forEach(market => grid.appendChild(renderPod(market)));
+}
+
+async function renderMatch(i) {
+  const fixture = CONFIG.layout.fixtures[i];
+  app.innerHTML = '';
+  if (!fixture) return;
+  await sleep(CONFIG.matchLatency);
+  app.appendChild(el('div', 'sph-EventHeader_Label', `${fixture.home} v ${fixture.away}`));
+  const bar = el('div', 'ipe-GridHeader');
+  const grid = el('div', 'ipe-EventViewDetail_MarketGrid');
+  const tabs = ['Popular', ...Object.keys(fixture.tabs)].map(name => {
+    const tab = el('div', 'ipe-GridHeaderTabLink', name);
+    tab.addEventListener('click', () => selectTab(fixture, grid, tabs, name));
+    bar.appendChild(tab);
+    return tab;
+  });
+  app.appendChild(bar);
+  app.appendChild(grid);
+  await selectTab(fixture, grid, tabs, 'Popular');
+}
+
+function startTicker() {
+  // Mimic in-play price updates so the scraper's quiet-window wait is exercised
+  if (ticker || !CONFIG.tickInterval) return;
+  ticker = setInterval(() => {
+    const prices = document.querySelectorAll('.gl-ParticipantOddsOnly_Odds');
+    if (!prices.length) return;
+    const price = prices[Math.floor(Math.random() * prices.length)];
+    price.textContent = CONFIG.prices[Math.floor(Math.random() * CONFIG.prices.length)];
+  }, CONFIG.tickInterval);
+}
+
+function route() {
+  const match = location.hash.match(/^#\\/match\\/(\\d+)/);
+  if (match) renderMatch(Number(match[1]));
+  else renderHome();
+}
+
+window.addEventListener('hashchange', route);
+route();
+startTicker();
+</script>
+</body>
+</html>
+"""
+
+
+class StandinSite:
+    """Threaded HTTP server for the stand-in sportsbook."""
+
+    def __init__(self, layout=None, host="127.0.0.1", port=0, page_latency=0,
+                 search_latency=300, match_latency=300, tab_latency=200, tick_interval=0):
+        self.layout = layout or default_layout()
+        self.page_latency = page_latency
+        self.page_config = {
+            "layout": self.layout,
+            "searchLatency": search_latency,
+            "matchLatency": match_latency,
+            "tabLatency": tab_latency,
+            "tickInterval": tick_interval,
+            "prices": PRICES,
+        }
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fixtures(self):
+        """Fixture strings in the scraper's 'Home - Away' format."""
+        return [f"{f['home']} - {f['away']}" for f in self.layout["fixtures"]]
+
+    def start(self):
+        """Serve in a background thread and return the base URL."""
+        self.thread = threading.Thread(target=self.server.serve_forever, name="standin-site", daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        site = self
+        body = PAGE.replace("__CONFIG__", json.dumps(self.page_config)).encode("utf-8")
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/":
+                    self.send_error(404)
+                    return
+                if site.page_latency:
+                    time.sleep(site.page_latency / 1000)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8365)
+    parser.add_argument("--layout", help="JSON market layout (default: generated)")
+    parser.add_argument("--fixtures", type=int, default=10, help="fixtures in the generated layout")
+    parser.add_argument("--page-latency", type=int, default=0, help="ms before the page HTML is served")
+    parser.add_argument("--search-latency", type=int, default=300, help="ms before search results render")
+    parser.add_argument("--match-latency", type=int, default=300, help="ms before the match page renders")
+    parser.add_argument("--tab-latency", type=int, default=200, help="ms before a tab's markets render")
+    parser.add_argument("--tick-interval", type=int, default=0, help="ms between simulated price changes (0 = off)")
+    args = parser.parse_args()
+
+    if args.layout:
+        with open(args.layout, encoding="utf-8") as f:
+            layout = json.load(f)
+    else:
+        layout = default_layout(args.fixtures)
+
+    site = StandinSite(
+        layout=layout, host=args.host, port=args.port, page_latency=args.page_latency,
+        search_latency=args.search_latency, match_latency=args.match_latency,
+        tab_latency=args.tab_latency, tick_interval=args.tick_interval,
+    )
+    print(f"Stand-in sportsbook on {site.url} with fixtures:")
+    for fixture in site.fixtures():
+        print(f"  {fixture}")
+    site.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
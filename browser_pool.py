@@ -0,0 +1,270 @@
+from patchright.async_api import async_playwright
+import asyncio
+import atexit
+import collections
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Lease priorities: waiting leases are served lowest value first
+PRIORITY_LIVE = 0
+PRIORITY_BACKGROUND = 100
+
+
+class _Slot:
+    """One pre-launched persistent browser context with its own profile dir."""
+
+    def __init__(self, index, user_data_dir):
+        self.index = index
+        self.user_data_dir = user_data_dir
+        self.context = None
+        self.alive = False
+        self.leased = False
+        self.uses = 0
+        self.launches = 0
+        self.lock = None
+
+
+class BrowserPool:
+    """Long-lived pool of browser contexts leased out to scrapes.
+
+    Playwright objects are bound to the event loop that created them, while
+    Flask runs every async view on its own short-lived loop. The pool therefore
+    owns a dedicated loop thread; scraping coroutines are submitted to it with
+    `run()` and lease contexts from inside that loop.
+    """
+
+    def __init__(self, size, data_dir, max_uses=50, health_interval=30,
+                 launch_options=None, relaunch_backoff=5, on_launch=None):
+        self.size = size
+        self.data_dir = data_dir
+        self.max_uses = max_uses
+        self.health_interval = health_interval
+        self.relaunch_backoff = relaunch_backoff
+        self.launch_options = launch_options or {}
+        self.on_launch = on_launch  # async callback(context) run after every launch
+        self.slots = [_Slot(i, os.path.join(data_dir, f"slot-{i}")) for i in range(size)]
+        self.loop = None
+        self.recycles = 0
+        self.startup_error = None  # set if Playwright itself could not start
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._idle = collections.deque()
+        self._waiters = []  # heap of (priority, seq, future) for leases waiting on a slot
+        self._seq = itertools.count()
+        self._started = asyncio.Event()
+        self._health_task = None
+        for slot in self.slots:
+            slot.lock = asyncio.Lock()
+
+    def start(self):
+        """Start the pool loop thread and begin launching contexts (non-blocking)."""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name="browser-pool", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._startup(), self.loop)
+            atexit.register(self.stop)
+
+    async def run(self, coro):
+        """Run a coroutine on the pool loop and await its result from any loop."""
+        self.start()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def run_sync(self, coro, timeout=None):
+        """Blocking variant of `run()` for callers without an event loop."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def wait_ready(self):
+        """Wait until every slot has had its first launch attempt."""
+        await self._started.wait()
+
+    def ready(self):
+        """True once every slot has had its first launch attempt."""
+        return self._started.is_set()
+
+    @contextlib.asynccontextmanager
+    async def lease(self, priority=PRIORITY_LIVE):
+        """Borrow a healthy browser context; it is returned or recycled on exit.
+
+        When every slot is busy, waiting leases get the next free slot in
+        ``priority`` order, so background work never holds up live requests.
+        """
+        await self._started.wait()
+        if self.startup_error:
+            raise RuntimeError(f"Browser pool failed to start: {self.startup_error}")
+        slot = await self._acquire(priority)
+        slot.leased = True
+        try:
+            async with slot.lock:
+                if not slot.alive or not await self._probe(slot):
+                    logger.warning(f"Browser slot {slot.index} unhealthy, relaunching")
+                    await self._launch(slot)
+            slot.uses += 1
+            yield slot.context
+        except Exception:
+            # Check whether the browser died underneath the caller
+            if slot.alive and not await self._probe(slot):
+                slot.alive = False
+            raise
+        finally:
+            slot.leased = False
+            if not slot.alive or slot.uses >= self.max_uses:
+                self.loop.create_task(self._recycle(slot))
+            else:
+                self._release(slot)
+
+    def stats(self):
+        """Snapshot of pool state for diagnostics."""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "waiting": sum(1 for _, _, future in self._waiters if not future.done()),
+            "leased": sum(1 for s in self.slots if s.leased),
+            "alive": sum(1 for s in self.slots if s.alive),
+            "launches": sum(s.launches for s in self.slots),
+            "recycles": self.recycles,
+        }
+
+    def stop(self):
+        """Close every context and stop the pool loop."""
+        if self.loop is None or not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(30)
+        except Exception as e:
+            logger.error(f"Error shutting down browser pool: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _startup(self):
+        try:
+            self._playwright = await async_playwright().start()
+        except Exception as e:
+            # Wake waiting leases so they fail instead of hanging
+            logger.error(f"Failed to start Playwright: {e}")
+            self.startup_error = str(e) or type(e).__name__
+            self._started.set()
+            return
+
+        async def launch_into_queue(slot):
+            try:
+                await self._launch(slot)
+            except Exception as e:
+                logger.error(f"Failed to launch browser slot {slot.index}: {e}")
+            self._release(slot)
+
+        await asyncio.gather(*(launch_into_queue(slot) for slot in self.slots))
+        self._started.set()
+        logger.info(f"Browser pool ready: {self.stats()}")
+        self._health_task = self.loop.create_task(self._health_loop())
+
+    async def _shutdown(self):
+        if self._health_task:
+            self._health_task.cancel()
+        for slot in self.slots:
+            await self._close(slot)
+        if self._playwright:
+            await self._playwright.stop()
+
+    async def _launch(self, slot):
+        await self._close(slot)
+        os.makedirs(slot.user_data_dir, exist_ok=True)
+        context = await self._playwright.chromium.launch_persistent_context(
+            user_data_dir=slot.user_data_dir,
+            **self.launch_options,
+        )
+        context.on("close", lambda _: self._mark_dead(slot, context))
+        if self.on_launch:
+            await self.on_launch(context)
+        slot.context = context
+        slot.alive = True
+        slot.uses = 0
+        slot.launches += 1
+        logger.info(f"Launched browser slot {slot.index} ({slot.user_data_dir})")
+
+    async def _close(self, slot):
+        context, slot.context = slot.context, None
+        slot.alive = False
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def _recycle(self, slot):
+        self.recycles += 1
+        async with slot.lock:
+            try:
+                await self._launch(slot)
+            except Exception as e:
+                logger.error(f"Failed to relaunch browser slot {slot.index}: {e}")
+                await asyncio.sleep(self.relaunch_backoff)
+        self._release(slot)
+
+    async def _acquire(self, priority):
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._idle and not self._waiters:
+            return self._idle.popleft()
+        future = self.loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Don't lose a slot handed over just as the waiter was cancelled
+            if future.done() and not future.cancelled():
+                self._release(future.result())
+            raise
+
+    def _release(self, slot):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(slot)
+                return
+        self._idle.append(slot)
+
+    async def _probe(self, slot):
+        if slot.context is None:
+            return False
+        try:
+            await asyncio.wait_for(slot.context.cookies(), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _health_loop(self):
+        # Relaunch dead idle contexts in the background so requests never pay for it
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for slot in self.slots:
+                if slot.leased or slot.lock.locked():
+                    continue
+                async with slot.lock:
+                    if slot.leased or (slot.alive and await self._probe(slot)):
+                        continue
+                    logger.warning(f"Health check failed for browser slot {slot.index}, relaunching")
+                    self.recycles += 1
+                    try:
+                        await self._launch(slot)
+                    except Exception as e:
+                        logger.error(f"Failed to relaunch browser slot {slot.index}: {e}")
+
+    def _mark_dead(self, slot, context):
+        if slot.context is context:
+            slot.alive = False
@@ -0,0 +1,120 @@
+import os
+
+# Runtime settings, all overridable through environment variables
+
+# Site to scrape; point at a stand-in (see bench/standin_site.py) to run offline
+BET365_URL = os.environ.get("BET365_URL", "https://www.bet365.com")
+
+# Browser pool
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+BROWSER_DATA_DIR = os.environ.get("BROWSER_DATA_DIR", "./browser_data")
+BROWSER_MAX_USES = int(os.environ.get("BROWSER_MAX_USES", "50"))
+BROWSER_HEALTH_INTERVAL = float(os.environ.get("BROWSER_HEALTH_INTERVAL", "30"))
+BROWSER_HEADLESS = os.environ.get("BROWSER_HEADLESS", "0") == "1"
+# Launch the pool when the app is imported so the first request doesn't pay for it
+PREWARM_BROWSERS = os.environ.get("PREWARM_BROWSERS", "1") == "1"
+
+# Fixture -> match page URL index
+FIXTURE_INDEX_PATH = os.environ.get("FIXTURE_INDEX_PATH", "./fixture_index.json")
+FIXTURE_INDEX_TTL = float(os.environ.get("FIXTURE_INDEX_TTL", str(6 * 60 * 60)))
+FIXTURE_INDEX_MAX_ENTRIES = int(os.environ.get("FIXTURE_INDEX_MAX_ENTRIES", "5000"))
+
+# Parsed market cache
+ODDS_CACHE_TTL = float(os.environ.get("ODDS_CACHE_TTL", "30"))
+# Oldest cached snapshot served when a request doesn't pass max_age. Entries can
+# be kept longer (prefetched ones last their refresh interval); callers opt in to
+# those with a larger max_age
+ODDS_DEFAULT_MAX_AGE = float(os.environ.get("ODDS_DEFAULT_MAX_AGE", str(ODDS_CACHE_TTL)))
+ODDS_CACHE_MAX_ENTRIES = int(os.environ.get("ODDS_CACHE_MAX_ENTRIES", "1000"))
+
+# Per-stage page timeouts in milliseconds, overridable as e.g. TIMEOUT_TAB_SWITCH_MS=3000
+_STAGE_TIMEOUT_DEFAULTS = {
+    "goto": 60000,
+    "body": 10000,
+    "search_bar": 10000,
+    "search_results": 15000,
+    "match_page": 15000,
+    "tab_link": 15000,
+    "tab_switch": 5000,
+    "market_grid": 10000,
+    "markets_populated": 5000,
+    "market_quiet": 3000,
+}
+STAGE_TIMEOUTS = {
+    stage: int(os.environ.get(f"TIMEOUT_{stage.upper()}_MS", str(default)))
+    for stage, default in _STAGE_TIMEOUT_DEFAULTS.items()
+}
+# How long prices must stop changing before the market grid counts as settled
+MARKET_QUIET_MS = int(os.environ.get("MARKET_QUIET_MS", "300"))
+
+# Request interception for scraping contexts
+INTERCEPTION_ENABLED = os.environ.get("INTERCEPTION_ENABLED", "1") == "1"
+# Resource types never needed to read market text. Stylesheets stay allowed because
+# innerText depends on computed styles.
+BLOCKED_RESOURCE_TYPES = os.environ.get("BLOCKED_RESOURCE_TYPES", "image,media,font").split(",")
+# Analytics, ad and tracking beacons, matched as regexes against the request URL
+BLOCKED_URL_PATTERNS = os.environ.get(
+    "BLOCKED_URL_PATTERNS",
+    r"google-analytics\.com,googletagmanager\.com,doubleclick\.net,facebook\.(net|com)/tr,"
+    r"hotjar\.com,newrelic\.com,nr-data\.net,clarity\.ms,/beacon,/analytics",
+).split(",")
+# URLs that are always let through, even if they match a blocked type or pattern
+ALLOWED_URL_PATTERNS = [p for p in os.environ.get("ALLOWED_URL_PATTERNS", "").split(",") if p]
+
+# Opt-in debug capture of screenshots, page HTML and market text
+DEBUG_CAPTURE_DIR = os.environ.get("DEBUG_CAPTURE_DIR", "./debug_captures")
+# Fraction of requests captured even when they don't ask for it (0 = only on request)
+DEBUG_CAPTURE_SAMPLE_RATE = float(os.environ.get("DEBUG_CAPTURE_SAMPLE_RATE", "0"))
+DEBUG_CAPTURE_MAX_BYTES = int(os.environ.get("DEBUG_CAPTURE_MAX_BYTES", str(200 * 1024 * 1024)))
+DEBUG_CAPTURE_MAX_REQUESTS = int(os.environ.get("DEBUG_CAPTURE_MAX_REQUESTS", "200"))
+
+# Async job queue
+JOB_QUEUE_MAX_DEPTH = int(os.environ.get("JOB_QUEUE_MAX_DEPTH", "100"))
+# Concurrent jobs; defaults to one per browser slot
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", str(BROWSER_POOL_SIZE)))
+# Seconds a job may wait in the queue before it is dropped, unless it sets its own
+JOB_DEFAULT_DEADLINE = float(os.environ.get("JOB_DEFAULT_DEADLINE", "300"))
+# Seconds finished jobs stay available for polling
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", "3600"))
+
+# Worker process id when running under supervisor.py (empty when standalone)
+WORKER_ID = os.environ.get("WORKER_ID", "")
+
+# Live watch mode: pinned match pages pushing market changes over Server-Sent Events.
+# Each watched fixture holds a browser pool slot, so keep this below BROWSER_POOL_SIZE
+WATCH_MAX_FIXTURES = int(os.environ.get("WATCH_MAX_FIXTURES", str(max(BROWSER_POOL_SIZE - 1, 1))))
+# Milliseconds of grid mutations coalesced into one update
+WATCH_DEBOUNCE_MS = int(os.environ.get("WATCH_DEBOUNCE_MS", "250"))
+# Seconds between keepalive comments on an idle event stream
+WATCH_KEEPALIVE = float(os.environ.get("WATCH_KEEPALIVE", "15"))
+# Event streams open at once per worker. Each one holds a server thread (the WSGI
+# executor has min(32, cpus + 4)), so keep this well under that to leave room for
+# every other request, /healthz included
+WATCH_MAX_LISTENERS = int(os.environ.get("WATCH_MAX_LISTENERS", str(max(min(32, (os.cpu_count() or 1) + 4) // 2, 1))))
+# Seconds a subscription may go without a connected listener before it is dropped
+WATCH_IDLE_TIMEOUT = float(os.environ.get("WATCH_IDLE_TIMEOUT", "60"))
+# Events buffered per subscription before it is resynced with a snapshot
+WATCH_SUBSCRIBER_BUFFER = int(os.environ.get("WATCH_SUBSCRIBER_BUFFER", "100"))
+# Seconds before reopening a watched fixture whose page failed
+WATCH_RETRY_BACKOFF = float(os.environ.get("WATCH_RETRY_BACKOFF", "10"))
+# Failed attempts in a row to open a watched fixture before its subscriptions are ended
+WATCH_MAX_FAILURES = int(os.environ.get("WATCH_MAX_FAILURES", "5"))
+
+# Columnar history of every price seen, segmented by UTC day
+HISTORY_DIR = os.environ.get("HISTORY_DIR", "./odds_history")
+HISTORY_RETENTION_DAYS = int(os.environ.get("HISTORY_RETENTION_DAYS", "30"))
+
+# Watchlist prefetching: "seconds before kickoff:refresh interval" pairs. A fixture at
+# least that far from kickoff is refreshed at that interval; the last pair covers in-play
+PREFETCH_SCHEDULE = os.environ.get("PREFETCH_SCHEDULE", "21600:1800,7200:600,1800:180,0:60")
+# Fixtures refreshed at once, only ever on otherwise idle browser slots
+PREFETCH_CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", "1"))
+# Seconds after kickoff a fixture stays on the watchlist
+PREFETCH_INPLAY_WINDOW = float(os.environ.get("PREFETCH_INPLAY_WINDOW", "7200"))
+
+# Fixture resolution: minimum match score (0-1) for a search result to count as the
+# requested fixture, optional JSON file of extra {"alias": "team name"} pairs, and how
+# many search terms to try before giving up
+FIXTURE_MATCH_MIN_SCORE = float(os.environ.get("FIXTURE_MATCH_MIN_SCORE", "0.8"))
+FIXTURE_ALIASES_PATH = os.environ.get("FIXTURE_ALIASES_PATH", "")
+FIXTURE_SEARCH_ATTEMPTS = int(os.environ.get("FIXTURE_SEARCH_ATTEMPTS", "2"))
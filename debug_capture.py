@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import random
+import re
+import shutil
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class DebugCapture:
+    """Debug artifacts for one request. Every method is a no-op when disabled."""
+
+    def __init__(self, store, request_id, enabled):
+        self.store = store
+        self.request_id = request_id
+        self.enabled = enabled
+
+    async def screenshot(self, page, name):
+        """Capture a full-page screenshot as ``<name>.png``."""
+        if not self.enabled:
+            return
+        try:
+            self.store.write(self.request_id, f"{name}.png", await page.screenshot(full_page=True))
+        except Exception as e:
+            logger.error(f"Debug screenshot {name} failed: {e}")
+
+    async def page_html(self, page, name):
+        """Capture the page's current HTML as ``<name>.html``."""
+        if not self.enabled:
+            return
+        try:
+            self.store.write(self.request_id, f"{name}.html", await page.content())
+        except Exception as e:
+            logger.error(f"Debug HTML capture {name} failed: {e}")
+
+    def text(self, name, content):
+        """Capture an already-extracted string, e.g. a market pod's HTML."""
+        if self.enabled and content is not None:
+            self.store.write(self.request_id, name, content)
+
+
+class CaptureStore:
+    """Size-bounded ring of per-request capture directories.
+
+    Writes and evictions run on a single background thread so the event loop never
+    blocks on disk I/O. When the store grows past ``max_bytes`` or ``max_requests``
+    the oldest request directories are deleted.
+    """
+
+    def __init__(self, root, max_bytes, max_requests, sample_rate=0.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_requests = max_requests
+        self.sample_rate = sample_rate
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug-capture")
+        self._sizes = None  # request_id -> bytes, in creation order; loaded lazily
+
+    def start(self, requested=False):
+        """Create the capture for a new request, enabled if asked for or sampled."""
+        enabled = bool(requested) or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        return DebugCapture(self, uuid.uuid4().hex[:12], enabled)
+
+    def write(self, request_id, name, data):
+        """Queue an artifact for writing; returns immediately."""
+        self._executor.submit(self._write, request_id, name, data)
+
+    def _write(self, request_id, name, data):
+        try:
+            if self._sizes is None:
+                self._sizes = self._scan()
+            directory = os.path.join(self.root, request_id)
+            os.makedirs(directory, exist_ok=True)
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            safe_name = re.sub(r"[^\w.-]+", "_", name)
+            with open(os.path.join(directory, safe_name), "wb") as f:
+                f.write(data)
+            self._sizes[request_id] = self._sizes.get(request_id, 0) + len(data)
+            self._evict(keep=request_id)
+        except Exception as e:
+            logger.error(f"Debug capture write {request_id}/{name} failed: {e}")
+
+    def _evict(self, keep):
+        while self._sizes and (
+            len(self._sizes) > self.max_requests or sum(self._sizes.values()) > self.max_bytes
+        ):
+            oldest = next(iter(self._sizes))
+            if oldest == keep:
+                break
+            del self._sizes[oldest]
+            shutil.rmtree(os.path.join(self.root, oldest), ignore_errors=True)
+
+    def _scan(self):
+        # Pick up captures left by earlier runs, oldest first
+        sizes = {}
+        if not os.path.isdir(self.root):
+            return sizes
+        entries = [e for e in os.scandir(self.root) if e.is_dir()]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            sizes[entry.name] = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+        return sizes
@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_fixture(fixture):
+    """Normalize a fixture string so spacing, case and separators don't matter."""
+    fixture = re.sub(r"\s+", " ", fixture.strip().lower())
+    return re.sub(r" (?:-|v|vs\.?) ", " - ", fixture)
+
+
+def fixture_participants(fixture):
+    """Split a 'Home - Away' fixture into its team names."""
+    return [team.strip() for team in fixture.split(" - ") if team.strip()]
+
+
+class FixtureIndex:
+    """Persistent map of fixture -> match page URL with TTL and LRU eviction.
+
+    Entries are stored as ``{key: {"url", "names", "created", "last_used"}}`` in a
+    JSON file that is rewritten atomically on every change. ``names`` are the
+    participants as the site spells them, to recognise the page on a later visit.
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = self._load()
+
+    def get(self, fixture):
+        """Return the cached match URL for a fixture, or None if unknown or expired."""
+        key = normalize_fixture(fixture)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        now = time.time()
+        if now - entry["created"] > self.ttl:
+            self.invalidate(fixture)
+            return None
+        entry["last_used"] = now
+        return entry["url"]
+
+    def put(self, fixture, url, names=None):
+        """Remember the match page URL for a fixture, and its participants' on-site names."""
+        now = time.time()
+        self.entries[normalize_fixture(fixture)] = {"url": url, "names": names, "created": now, "last_used": now}
+        self._evict(now)
+        self._save()
+
+    def names(self, fixture):
+        """The on-site participant names stored with a fixture's URL, or None."""
+        entry = self.entries.get(normalize_fixture(fixture))
+        return entry.get("names") if entry else None
+
+    def invalidate(self, fixture):
+        """Forget a fixture, e.g. when its URL no longer shows the expected match."""
+        if self.entries.pop(normalize_fixture(fixture), None) is not None:
+            self._save()
+
+    def _evict(self, now):
+        # Drop expired entries first, then the least recently used ones
+        for key in [k for k, e in self.entries.items() if now - e["created"] > self.ttl]:
+            del self.entries[key]
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"])[:overflow]:
+                del self.entries[key]
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load fixture index {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save fixture index {self.path}: {e}")
@@ -0,0 +1,239 @@
+from collections import OrderedDict
+import difflib
+import json
+import logging
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Club-type tokens that say nothing about which club it is
+NOISE_TOKENS = {"fc", "cf", "afc", "sc", "ac", "fk", "sk", "cd", "ud", "sv", "bk", "club", "the"}
+
+# Abbreviations expanded token by token
+TOKEN_ALIASES = {
+    "utd": "united",
+    "st": "saint",
+    "ste": "sainte",
+    "man": "manchester",
+    "ath": "athletic",
+    "atl": "atletico",
+    "dep": "deportivo",
+    "wed": "wednesday",
+    "munchen": "munich",
+    "olymp": "olympique",
+}
+
+# Nicknames and short forms mapped to a full normalized name
+NAME_ALIASES = {
+    "psg": "paris saint germain",
+    "spurs": "tottenham hotspur",
+    "tottenham": "tottenham hotspur",
+    "wolves": "wolverhampton wanderers",
+    "inter": "internazionale",
+    "inter milan": "internazionale",
+    "bayern": "bayern munich",
+    "gladbach": "borussia monchengladbach",
+    "atletico": "atletico madrid",
+}
+
+# Separators between participants in a fixture or search result
+PARTICIPANT_SPLIT = re.compile(r"\s+(?:v|vs\.?|-|@)\s+", re.IGNORECASE)
+
+# Home/away swapped results still match, but a same-order match wins ties
+SWAPPED_PENALTY = 0.95
+
+# Token pairs scoring below this are unmatched and count for nothing
+TOKEN_MATCH_MIN = 0.75
+
+# Tokens that set a team apart from another side of the same club; one left
+# unmatched on either side means a different team, e.g. "Arsenal Women"
+TEAM_MARKERS = {
+    "women", "w", "ladies", "ii", "b", "reserves", "res", "youth", "academy",
+    "u17", "u18", "u19", "u20", "u21", "u23",
+}
+
+
+def normalize_name(name, aliases=NAME_ALIASES):
+    """Reduce a team name to comparable tokens: no accents, case, punctuation or noise words."""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    tokens = [TOKEN_ALIASES.get(token, token) for token in re.findall(r"[a-z0-9]+", text)]
+    joined = " ".join([token for token in tokens if token not in NOISE_TOKENS] or tokens)
+    return tuple(aliases.get(joined, joined).split())
+
+
+def split_participants(text):
+    """Split 'Home v Away' style text into its two participants, or None."""
+    parts = [part.strip() for part in PARTICIPANT_SPLIT.split(text.strip())]
+    return parts if len(parts) == 2 and all(parts) else None
+
+
+def _token_score(a, b):
+    if a == b:
+        return 1.0
+    # Initials, e.g. "B. Monchengladbach"
+    if min(len(a), len(b)) == 1:
+        return 0.8 if a[0] == b[0] else 0.0
+    # Truncated names, e.g. "Monchengladbach" / "Monchen"
+    if min(len(a), len(b)) >= 4 and (a.startswith(b) or b.startswith(a)):
+        return 0.9
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def name_similarity(a, b):
+    """Symmetric token-set similarity of two normalized names, from 0 to 1.
+
+    Tokens are paired one to one, best pairs first. Unpaired tokens on either
+    side score 0, and an unpaired ``TEAM_MARKERS`` token makes the whole score 0.
+    """
+    if not a or not b:
+        return 0.0
+    pairs = sorted(((_token_score(t, u), i, j) for i, t in enumerate(a) for j, u in enumerate(b)), reverse=True)
+    matched_a, matched_b = {}, {}
+    for score, i, j in pairs:
+        if score < TOKEN_MATCH_MIN:
+            break
+        if i not in matched_a and j not in matched_b:
+            matched_a[i] = matched_b[j] = score
+    for tokens, matched in ((a, matched_a), (b, matched_b)):
+        if any(token in TEAM_MARKERS for i, token in enumerate(tokens) if i not in matched):
+            return 0.0
+    return (sum(matched_a.values()) + sum(matched_b.values())) / (len(a) + len(b))
+
+
+class FixtureResolver:
+    """Matches requested fixtures against sportsbook search results.
+
+    Both participants are compared token by token after normalization and alias
+    expansion, in either home/away order, and each must match on its own, so one
+    pass over the results picks the best candidate. Fixtures naming a single team
+    are matched on that team alone. The participants of every matched result are
+    remembered with their on-site spelling (LRU, ``max_participants``) and used to
+    pick search terms that will hit. Thread-safe.
+    """
+
+    def __init__(self, aliases=None, min_score=0.8, max_participants=5000, max_terms=2):
+        self.aliases = dict(NAME_ALIASES)
+        self.aliases.update({
+            " ".join(normalize_name(alias, {})): " ".join(normalize_name(name, {}))
+            for alias, name in (aliases or {}).items()
+        })
+        self.min_score = min_score
+        self.max_participants = max_participants
+        self.max_terms = max_terms
+        self.participants = OrderedDict()  # normalized tokens -> name as shown on the site
+        self._by_prefix = {}  # token prefix -> set of normalized tokens, to narrow lookups
+        self._lock = threading.Lock()
+
+    def normalize(self, name):
+        return normalize_name(name, self.aliases)
+
+    def teams(self, fixture):
+        """A fixture's participants, or just the fixture itself when it names one team."""
+        return split_participants(fixture) or [fixture.strip()]
+
+    def score(self, fixture, candidate):
+        """How well a 'Home v Away' result matches a fixture, from 0 to 1.
+
+        The score is that of the worse-matching participant.
+        """
+        sides = split_participants(candidate)
+        if sides is None:
+            return 0.0
+        teams = [self.normalize(team) for team in self.teams(fixture)]
+        result_home, result_away = (self.normalize(side) for side in sides)
+        if len(teams) == 1:
+            return max(name_similarity(teams[0], result_home), name_similarity(teams[0], result_away) * SWAPPED_PENALTY)
+        home, away = teams
+        same_order = min(name_similarity(home, result_home), name_similarity(away, result_away))
+        swapped = min(name_similarity(home, result_away), name_similarity(away, result_home))
+        return max(same_order, swapped * SWAPPED_PENALTY)
+
+    def best_candidate(self, fixture, candidates):
+        """Return ``(index, score)`` of the best-matching result text.
+
+        ``index`` is None when nothing reaches ``min_score``. The participants of
+        the picked result are learned for later searches.
+        """
+        best_index, best_score = None, 0.0
+        for i, candidate in enumerate(candidates):
+            score = self.score(fixture, candidate)
+            if score > best_score:
+                best_index, best_score = i, score
+        if best_score < self.min_score:
+            return None, best_score
+        self.learn(candidates[best_index])
+        return best_index, best_score
+
+    def learn(self, candidate):
+        """Remember the participants of a 'Home v Away' result under their site spelling."""
+        sides = split_participants(candidate)
+        if sides is None:
+            return
+        with self._lock:
+            for side in sides:
+                key = self.normalize(side)
+                if not key:
+                    continue
+                if key not in self.participants:
+                    for token in key:
+                        self._by_prefix.setdefault(token[:3], set()).add(key)
+                self.participants[key] = side
+                self.participants.move_to_end(key)
+            while len(self.participants) > self.max_participants:
+                evicted, _ = self.participants.popitem(last=False)
+                for token in evicted:
+                    self._by_prefix.get(token[:3], set()).discard(evicted)
+
+    def site_name(self, team):
+        """The learned on-site spelling of a team, or None if it hasn't been seen."""
+        key = self.normalize(team)
+        with self._lock:
+            if key in self.participants:
+                return self.participants[key]
+            candidates = set()
+            for token in key:
+                candidates |= self._by_prefix.get(token[:3], set())
+            best, best_score = None, self.min_score
+            for candidate in candidates:
+                score = name_similarity(key, candidate)
+                if score >= best_score:
+                    best, best_score = self.participants[candidate], score
+            return best
+
+    def site_names(self, fixture):
+        """Each participant under its on-site spelling where known."""
+        return [self.site_name(team) or team for team in self.teams(fixture)]
+
+    def search_terms(self, fixture):
+        """Search terms to try in order, most likely to find the fixture first.
+
+        Learned on-site spellings come before the requested names, home before away.
+        """
+        teams = self.teams(fixture)
+        terms = [self.site_name(team) for team in teams] + teams
+        unique = []
+        for term in terms:
+            if term and term.lower() not in (t.lower() for t in unique):
+                unique.append(term)
+        return unique[:self.max_terms]
+
+    def stats(self):
+        with self._lock:
+            return {"participants": len(self.participants), "aliases": len(self.aliases)}
+
+
+def load_aliases(path):
+    """Read extra ``{alias: name}`` pairs from a JSON file; missing file means none."""
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logger.error(f"Could not read fixture aliases from {path}: {e}")
+        return {}
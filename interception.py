@@ -0,0 +1,78 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Rough transfer sizes per resource type, used to estimate bandwidth saved. Blocked
+# requests are never fetched, so their real size is unknown.
+ESTIMATED_BYTES = {
+    "image": 25_000,
+    "media": 400_000,
+    "font": 40_000,
+    "script": 60_000,
+    "stylesheet": 30_000,
+}
+DEFAULT_ESTIMATED_BYTES = 2_000
+
+# Blocked requests of these types get an empty 200 instead of a network error, so
+# the page's loaders and beacons don't retry or take error paths
+STUB_TYPES = {"script", "xhr", "fetch", "ping", "eventsource", "other"}
+
+
+class RequestInterceptor:
+    """Route handler that blocks or stubs requests a scrape doesn't need.
+
+    Install it on every browser context; counters are shared across all of them.
+    """
+
+    def __init__(self, blocked_types, blocked_patterns, allowed_patterns=()):
+        self.blocked_types = {t.strip() for t in blocked_types if t.strip()}
+        self.blocked_pattern = self._compile(blocked_patterns)
+        self.allowed_pattern = self._compile(allowed_patterns)
+        self.allowed = 0
+        self.blocked = {}  # resource type -> count
+        self.estimated_bytes_saved = 0
+
+    async def install(self, context):
+        """Attach the interceptor to a browser context."""
+        await context.route("**/*", self._handle)
+
+    def should_block(self, url, resource_type):
+        """True if a request should be blocked or stubbed."""
+        if self.allowed_pattern and self.allowed_pattern.search(url):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return bool(self.blocked_pattern and self.blocked_pattern.search(url))
+
+    def stats(self):
+        return {
+            "allowed": self.allowed,
+            "blocked": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+        }
+
+    async def _handle(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        try:
+            if not self.should_block(request.url, resource_type):
+                self.allowed += 1
+                await route.continue_()
+                return
+
+            self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+            self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+            if resource_type in STUB_TYPES:
+                await route.fulfill(status=200, body="")
+            else:
+                await route.abort("blockedbyclient")
+        except Exception as e:
+            # The page may have navigated away or closed while the request was pending
+            logger.debug(f"Route handling failed for {request.url}: {e}")
+
+    @staticmethod
+    def _compile(patterns):
+        patterns = [p.strip() for p in patterns if p.strip()]
+        return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
@@ -0,0 +1,172 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+import urllib.request
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at max depth."""
+
+
+class Job:
+    def __init__(self, fixture, bet_types, priority=0, deadline=None, callback_url=None, max_age=None,
+                 id_prefix=""):
+        # The prefix lets a router find the worker process that owns the job
+        self.id = f"{id_prefix}{uuid.uuid4().hex}"
+        self.fixture = fixture
+        self.bet_types = bet_types
+        self.priority = priority
+        self.deadline = deadline  # absolute time.time() after which the job is dropped
+        self.callback_url = callback_url
+        self.max_age = max_age
+        self.status = "queued"
+        self.result = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "fixture": self.fixture,
+            "bet_types": self.bet_types,
+            "priority": self.priority,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.result is not None:
+            job["results"] = self.result
+        return job
+
+
+class JobQueue:
+    """Bounded priority queue of scrape jobs worked off on the browser pool loop.
+
+    ``submit`` is thread-safe and returns immediately; at most ``workers`` jobs run
+    at once. Lower ``priority`` values run first. Jobs whose deadline passes while
+    queued are expired instead of scraped. Finished jobs are kept for ``retention``
+    seconds so their results can be polled.
+    """
+
+    def __init__(self, pool, run_job, max_depth, workers, retention):
+        self.pool = pool
+        self.run_job = run_job  # async callable(job) -> results
+        self.max_depth = max_depth
+        self.workers = workers
+        self.retention = retention
+        self.jobs = {}
+        self.expired = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._available = asyncio.Semaphore(0)
+        self._started = False
+
+    def submit(self, job):
+        """Queue a job, raising QueueFull when ``max_depth`` jobs are already waiting."""
+        self._ensure_started()
+        with self._lock:
+            self._prune()
+            self._expire_queued()
+            if len(self._heap) >= self.max_depth:
+                raise QueueFull(f"Job queue is full ({self.max_depth} jobs waiting)")
+            self.jobs[job.id] = job
+            heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+        self.pool.loop.call_soon_threadsafe(self._available.release)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def depth(self):
+        return len(self._heap)
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for job in self.jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"depth": len(self._heap), "expired": self.expired, "jobs": statuses}
+
+    def _ensure_started(self):
+        self.pool.start()
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.workers):
+            asyncio.run_coroutine_threadsafe(self._worker(), self.pool.loop)
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            with self._lock:
+                if not self._heap:
+                    continue
+                _, _, job = heapq.heappop(self._heap)
+
+            if job.deadline is not None and time.time() > job.deadline:
+                self._expire(job)
+                continue
+
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                self._finish(job, "done", await self.run_job(job))
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                self._finish(job, "failed", {"error": f"General scraping error: {str(e)}"})
+
+    def _finish(self, job, status, result):
+        job.status = status
+        job.result = result
+        job.finished_at = time.time()
+        if job.callback_url:
+            # Also called from request threads when queued jobs expire
+            asyncio.run_coroutine_threadsafe(self._callback(job), self.pool.loop)
+
+    def _expire(self, job):
+        self.expired += 1
+        self._finish(job, "expired", {"error": "Job deadline passed before it could run"})
+
+    def _expire_queued(self):
+        # Stale jobs must not count toward max_depth while the workers are busy
+        now = time.time()
+        expired = [job for _, _, job in self._heap if job.deadline is not None and now > job.deadline]
+        if not expired:
+            return
+        self._heap = [entry for entry in self._heap if entry[2] not in expired]
+        heapq.heapify(self._heap)
+        for job in expired:
+            self._expire(job)
+
+    async def _callback(self, job):
+        body = json.dumps(job.to_dict()).encode("utf-8")
+        request = urllib.request.Request(
+            job.callback_url, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            await asyncio.to_thread(_post, request)
+        except Exception as e:
+            logger.error(f"Callback for job {job.id} to {job.callback_url} failed: {e}")
+
+    def _prune(self):
+        # Forget finished jobs once they are past the retention window
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+
+def _post(request):
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
@@ -0,0 +1,174 @@
+from html.parser import HTMLParser
+import re
+
+# A threshold line, e.g. "2.5", or a split (quarter) line, e.g. "9.0, 9.5"
+THRESHOLD_LINE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*,\s*(\d+(?:\.\d+)?))?$")
+# "<threshold> <over> <under>" on consecutive tokens
+THRESHOLD_ROW = re.compile(r"(\d+\.?\d*)\s+([0-9/.]+)\s+([0-9/.]+)")
+# "Over <threshold> <price>" / "Under <threshold> <price>" labels
+OVER_ROW = re.compile(r"Over\s+([\d.]+)\s+([0-9/.]+)")
+UNDER_ROW = re.compile(r"Under\s+([\d.]+)\s+([0-9/.]+)")
+
+# Lines that are never thresholds or prices (bet builder badge)
+SKIP_LINES = {"BB"}
+
+# Elements that start a new line in innerText, for HTML input
+BLOCK_TAGS = {"div", "p", "li", "tr", "br", "table", "section", "header", "footer", "ul", "ol"}
+TITLE_CLASS = "sip-MarketGroupButton_Text"
+
+
+def convert_fractional_to_decimal(fraction):
+    """Convert fractional odds (e.g., '5/2') to decimal odds."""
+    try:
+        if '/' in fraction:
+            numerator, denominator = map(float, fraction.split('/'))
+            decimal = (numerator / denominator) + 1
+            return round(decimal, 2)
+        return float(fraction)  # Handle decimal odds directly
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def fractions_to_decimals(fractions):
+    """Convert a list of fractional odds to decimals, converting each distinct price once."""
+    table = {fraction: convert_fractional_to_decimal(fraction) for fraction in set(fractions) if fraction}
+    return [table.get(fraction) for fraction in fractions]
+
+
+def scan_pod_text(text, title=None):
+    """Split a pod's innerText into thresholds and Over/Under price columns in one pass.
+
+    Numeric lines before the "Over" header are thresholds; lines after "Over" and
+    "Under" are that column's prices. A split line such as "9.0, 9.5" is one row,
+    keyed by its midpoint (9.25). Returns ``(thresholds, over, under)``.
+    """
+    thresholds, over, under = [], [], []
+    column = None
+    for raw in text.split("\n"):
+        line = raw.strip()
+        if not line or line == title or line in SKIP_LINES:
+            continue
+        if line == "Over":
+            column = over
+        elif line == "Under":
+            column = under
+        elif column is not None:
+            column.append(line)
+        else:
+            match = THRESHOLD_LINE.match(line)
+            if match:
+                low, high = match.groups()
+                thresholds.append(float(low) if high is None else (float(low) + float(high)) / 2)
+    return thresholds, over, under
+
+
+def pair_market_lines(thresholds, over, under, text):
+    """Pair thresholds with Over/Under prices, falling back to regexes over the raw text.
+
+    Returns ``{threshold: {"Over": price, "Under": price}}``.
+    """
+    parsed_data = {}
+
+    # Counts align: pair row by row
+    if thresholds and len(thresholds) == len(over) == len(under):
+        for threshold, over_price, under_price in zip(thresholds, over, under):
+            parsed_data[threshold] = {"Over": over_price, "Under": under_price}
+        return parsed_data
+
+    # Under column short (e.g. a suspended line): keep the order, pad with None
+    if len(thresholds) == len(over) and under:
+        for i, threshold in enumerate(thresholds):
+            parsed_data[threshold] = {"Over": over[i], "Under": under[i] if i < len(under) else None}
+        return parsed_data
+
+    # "<threshold> <over> <under>" rows in the raw text
+    for threshold, over_price, under_price in THRESHOLD_ROW.findall(text):
+        try:
+            parsed_data[float(threshold)] = {"Over": over_price, "Under": under_price}
+        except ValueError:
+            pass
+    if parsed_data:
+        return parsed_data
+
+    # "Over <threshold> <price>" / "Under <threshold> <price>" labels
+    for pattern, side in ((OVER_ROW, "Over"), (UNDER_ROW, "Under")):
+        for threshold, price in pattern.findall(text):
+            try:
+                row = parsed_data.setdefault(float(threshold), {"Over": None, "Under": None})
+            except ValueError:
+                continue
+            row[side] = price
+    return parsed_data
+
+
+def parse_pod_text(text, title=None):
+    """Parse a pod's innerText into ``{threshold: {"Over", "Under"}}``."""
+    thresholds, over, under = scan_pod_text(text, title)
+    return pair_market_lines(thresholds, over, under, text)
+
+
+class _PodTextExtractor(HTMLParser):
+    """Approximate innerText for pod HTML: block elements start new lines."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.title_parts = None
+        self.title = None
+        self.title_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        if self.title_depth:
+            self.title_depth += 1
+        elif self.title is None and TITLE_CLASS in (dict(attrs).get("class") or "").split():
+            self.title_parts = []
+            self.title_depth = 1
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        if self.title_depth:
+            self.title_depth -= 1
+            if not self.title_depth:
+                self.title = "".join(self.title_parts).strip()
+
+    def handle_data(self, data):
+        self.parts.append(data)
+        if self.title_depth:
+            self.title_parts.append(data)
+
+
+def pod_html_to_text(html):
+    """Return ``(title, text)`` for a pod's outerHTML."""
+    extractor = _PodTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = (line.strip() for line in "".join(extractor.parts).split("\n"))
+    return extractor.title, "\n".join(line for line in lines if line)
+
+
+def parse_pod_html(html):
+    """Parse a pod's outerHTML. Returns ``(title, {threshold: {"Over", "Under"}})``."""
+    title, text = pod_html_to_text(html)
+    return title, parse_pod_text(text, title)
+
+
+def market_table(parsed_data):
+    """Normalize parsed market data into rows sorted by threshold, with decimal prices."""
+    thresholds = sorted(parsed_data)
+    overs = [parsed_data[threshold].get("Over") for threshold in thresholds]
+    unders = [parsed_data[threshold].get("Under") for threshold in thresholds]
+    over_decimals = fractions_to_decimals(overs)
+    under_decimals = fractions_to_decimals(unders)
+    return [
+        {
+            "threshold": thresholds[i],
+            "over": overs[i],
+            "under": unders[i],
+            "over_decimal": over_decimals[i],
+            "under_decimal": under_decimals[i],
+        }
+        for i in range(len(thresholds))
+    ]
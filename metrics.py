@@ -0,0 +1,149 @@
+import threading
+import time
+
+# Latency buckets in seconds, spanning cache hits to full cold scrapes
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+class Counter:
+    def __init__(self, registry, name, help_text, label_names):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}  # label values tuple -> count
+
+    def inc(self, *labels, amount=1):
+        with self.registry.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, registry, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values tuple -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labels):
+        with self.registry.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ['le'], labels + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names + ['le'], labels + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose values are read from a callback at render time.
+
+    The callback returns ``{label values tuple: value}``.
+    """
+
+    def __init__(self, name, help_text, label_names, callback):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal in-process metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+
+    def counter(self, name, help_text, label_names=()):
+        return self._add(Counter(self, name, help_text, list(label_names)))
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self, name, help_text, list(label_names), buckets))
+
+    def gauge(self, name, help_text, label_names, callback):
+        return self._add(Gauge(name, help_text, list(label_names), callback))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            if isinstance(metric, Gauge):
+                lines.extend(metric.render())
+                continue
+            with self.lock:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+
+class StageTimer:
+    """Per-request lap timer feeding the stage latency histogram and error counter.
+
+    Each ``lap(stage)`` attributes the time since the previous lap to ``stage``;
+    ``breakdown()`` returns the per-stage totals for the response.
+    """
+
+    def __init__(self, stage_histogram, error_counter):
+        self.stage_histogram = stage_histogram
+        self.error_counter = error_counter
+        self.started = self.last = time.perf_counter()
+        self.stages = {}
+
+    def reset(self):
+        """Start the next lap now without attributing the time since the last one."""
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed
+        self.stage_histogram.observe(elapsed, stage)
+
+    def error(self, stage):
+        self.error_counter.inc(stage)
+
+    def breakdown(self):
+        timings = {stage: round(seconds, 3) for stage, seconds in self.stages.items()}
+        timings["total"] = round(time.perf_counter() - self.started, 3)
+        return timings
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+import asyncio
+import time
+
+
+class OddsCache:
+    """In-process TTL/LRU cache of parsed market data with single-flight loading.
+
+    Not thread-safe: use it from a single event loop (the browser pool loop).
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (stored_at, ttl, value)
+        self.inflight = {}  # key -> Future shared by concurrent misses
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, max_age=None):
+        """Return ``(value, age)`` if the key is cached and fresh enough, else None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        stored_at, ttl, value = entry
+        age = time.time() - stored_at
+        if age > ttl:
+            del self.entries[key]
+            return None
+        if max_age is not None and age > max_age:
+            return None
+        self.entries.move_to_end(key)
+        return value, age
+
+    def put(self, key, value, ttl=None):
+        """Store a value, kept for ``ttl`` seconds instead of the default if given."""
+        self.entries[key] = (time.time(), self.ttl if ttl is None else ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def fetch_many(self, keys, load, max_age=None, cacheable=lambda value: True, ttl=None):
+        """Return ``{key: (value, age)}``, loading every miss with one ``load`` call.
+
+        ``load(missing_keys)`` must return ``{key: value}``. Keys already being
+        loaded by another caller are awaited instead of loaded again. Only values
+        passing ``cacheable`` are stored, for ``ttl`` seconds if given.
+        """
+        results = {}
+        waiting = {}
+        to_load = []
+        for key in keys:
+            hit = self.get(key, max_age)
+            if hit is not None:
+                self.hits += 1
+                results[key] = hit
+            elif key in self.inflight:
+                self.coalesced += 1
+                waiting[key] = self.inflight[key]
+            else:
+                self.misses += 1
+                to_load.append(key)
+
+        if to_load:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in to_load}
+            self.inflight.update(futures)
+            try:
+                loaded = await load(to_load)
+                for key, future in futures.items():
+                    value = loaded.get(key)
+                    if value is not None and cacheable(value):
+                        self.put(key, value, ttl)
+                    future.set_result(value)
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()  # Mark retrieved when nobody else is waiting
+                raise
+            finally:
+                for key, future in futures.items():
+                    if not future.done():
+                        future.cancel()
+                    self.inflight.pop(key, None)
+            waiting.update(futures)
+
+        for key, future in waiting.items():
+            results[key] = (await asyncio.shield(future), 0.0)
+        return results
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "inflight": len(self.inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,315 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+
+from fixture_index import normalize_fixture
+
+logger = logging.getLogger(__name__)
+
+# One append-only file per column in each day segment
+COLUMNS = {
+    "time": "d",
+    "fixture": "I",
+    "market": "I",
+    "threshold": "d",
+    "over": "d",
+    "under": "d",
+}
+
+KEYS_FILE = "keys.jsonl"
+
+
+def _day(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _price(value):
+    return None if math.isnan(value) else value
+
+
+class _Segment:
+    """One day of observations held as parallel column arrays."""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = {name: array(code) for name, code in COLUMNS.items()}
+        self.index = {}  # (fixture id, market id) -> array of row numbers, in time order
+        self._files = None
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def load(self):
+        for name, column in self.columns.items():
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+                column.frombytes(data[:len(data) - len(data) % column.itemsize])
+        # A crash mid-append can leave columns of different lengths
+        rows = min(len(column) for column in self.columns.values())
+        for name, column in self.columns.items():
+            if len(column) > rows:
+                del column[rows:]
+                with open(os.path.join(self.path, name), "r+b") as f:
+                    f.truncate(rows * column.itemsize)
+        for row in range(rows):
+            key = (self.columns["fixture"][row], self.columns["market"][row])
+            self.index.setdefault(key, array("I")).append(row)
+
+    def append(self, rows):
+        if self._files is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._files = {name: open(os.path.join(self.path, name), "ab") for name in COLUMNS}
+        start = len(self)
+        batch = {name: array(code) for name, code in COLUMNS.items()}
+        for offset, row in enumerate(rows):
+            for name in COLUMNS:
+                batch[name].append(row[name])
+            self.index.setdefault((row["fixture"], row["market"]), array("I")).append(start + offset)
+        for name, column in batch.items():
+            self.columns[name].extend(column)
+            column.tofile(self._files[name])
+            self._files[name].flush()
+
+    def close(self):
+        for f in (self._files or {}).values():
+            f.close()
+        self._files = None
+
+    def row(self, row):
+        return {
+            "time": self.columns["time"][row],
+            "threshold": self.columns["threshold"][row],
+            "over": _price(self.columns["over"][row]),
+            "under": _price(self.columns["under"][row]),
+        }
+
+
+class OddsHistory:
+    """Append-only columnar store of observed prices, segmented by UTC day.
+
+    Each segment directory holds one binary file per column (time, fixture,
+    market, threshold, over, under); fixture and market names are interned into
+    ``keys.jsonl``. Segments are loaded into arrays at startup with an in-memory
+    index by (fixture, market). A row is only written when a threshold's price
+    differs from the last one recorded, so a price holds from its row until the
+    next. A threshold that disappears from a recorded market gets a row with no
+    prices, so it no longer reads as on offer. Segments older than
+    ``retention_days`` are deleted.
+    """
+
+    def __init__(self, root, retention_days=30):
+        self.root = root
+        self.retention_days = retention_days
+        self.keys = []
+        self.key_ids = {}
+        self.segments = {}  # day -> _Segment, oldest first
+        self.last = {}  # (fixture id, market id) -> {threshold: (over, under)}
+        self.rows = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def record(self, fixture, markets, ts=None):
+        """Record ``{market: {threshold: {"Over", "Under"}}}`` decimal prices observed at ``ts``.
+
+        Returns the number of rows written.
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            fixture_id = self._key_id(normalize_fixture(fixture))
+            rows = []
+            for market, prices in markets.items():
+                market_id = self._key_id(market)
+                last = self.last.setdefault((fixture_id, market_id), {})
+                observed = {}
+                for threshold, sides in prices.items():
+                    over = sides.get("Over")
+                    under = sides.get("Under")
+                    observed[float(threshold)] = (
+                        math.nan if over is None else float(over),
+                        math.nan if under is None else float(under),
+                    )
+                # Thresholds no longer offered close with an empty row
+                for threshold in last:
+                    if threshold not in observed:
+                        observed[threshold] = (math.nan, math.nan)
+                for threshold, (over, under) in observed.items():
+                    if self._same(last.get(threshold), (over, under)):
+                        continue
+                    last[threshold] = (over, under)
+                    rows.append({
+                        "time": ts, "fixture": fixture_id, "market": market_id,
+                        "threshold": threshold, "over": over, "under": under,
+                    })
+            if rows:
+                self._segment(_day(ts)).append(rows)
+                self.rows += len(rows)
+            return len(rows)
+
+    def latest(self, fixture, market, threshold=None):
+        """Most recent price per threshold: ``{threshold: {"time", "over", "under"}}``."""
+        return self.at(fixture, market, math.inf, threshold)
+
+    def at(self, fixture, market, ts, threshold=None):
+        """Price in force at ``ts`` per threshold (the last row at or before it)."""
+        with self._lock:
+            result = {}
+            for segment, rows in reversed(self._rows(fixture, market)):
+                end = bisect_right(rows, ts, key=lambda row: segment.columns["time"][row])
+                for row in reversed(rows[:end]):
+                    observation = segment.row(row)
+                    if threshold is not None and observation["threshold"] != threshold:
+                        continue
+                    result.setdefault(observation.pop("threshold"), observation)
+                if threshold is not None and result:
+                    break
+            return dict(sorted(result.items()))
+
+    def movement(self, fixture, market, start, end, threshold=None):
+        """How each threshold's price moved between ``start`` and ``end``.
+
+        Returns ``{threshold: {"open", "close", "changes", "over_low", "over_high",
+        "under_low", "under_high"}}`` where ``open``/``close`` are the prices in
+        force at the window edges and ``changes`` lists every new price inside it.
+        """
+        opening = self.at(fixture, market, start, threshold)
+        with self._lock:
+            changes = {}
+            for segment, rows in self._rows(fixture, market):
+                times = segment.columns["time"]
+                # Rows at exactly ``start`` are already the opening price
+                first = bisect_right(rows, start, key=lambda row: times[row])
+                last = bisect_right(rows, end, key=lambda row: times[row])
+                for row in rows[first:last]:
+                    observation = segment.row(row)
+                    if threshold is not None and observation["threshold"] != threshold:
+                        continue
+                    changes.setdefault(observation.pop("threshold"), []).append(observation)
+
+        result = {}
+        for t in sorted(set(opening) | set(changes)):
+            points = ([opening[t]] if t in opening else []) + changes.get(t, [])
+            overs = [p["over"] for p in points if p["over"] is not None]
+            unders = [p["under"] for p in points if p["under"] is not None]
+            result[t] = {
+                "open": opening.get(t),
+                "close": points[-1],
+                "changes": changes.get(t, []),
+                "over_low": min(overs, default=None),
+                "over_high": max(overs, default=None),
+                "under_low": min(unders, default=None),
+                "under_high": max(unders, default=None),
+            }
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"rows": self.rows, "segments": len(self.segments), "keys": len(self.keys)}
+
+    def close(self):
+        with self._lock:
+            for segment in self.segments.values():
+                segment.close()
+
+    def _rows(self, fixture, market):
+        fixture_id = self.key_ids.get(normalize_fixture(fixture))
+        market_id = self.key_ids.get(market)
+        if fixture_id is None or market_id is None:
+            return []
+        return [
+            (segment, segment.index[(fixture_id, market_id)])
+            for segment in self.segments.values()
+            if (fixture_id, market_id) in segment.index
+        ]
+
+    def _key_id(self, key):
+        key_id = self.key_ids.get(key)
+        if key_id is None:
+            key_id = self.key_ids[key] = len(self.keys)
+            self.keys.append(key)
+            with open(os.path.join(self.root, KEYS_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(key) + "\n")
+        return key_id
+
+    def _segment(self, day):
+        segment = self.segments.get(day)
+        if segment is None:
+            segment = self.segments[day] = _Segment(os.path.join(self.root, day))
+            self._expire(day)
+        return segment
+
+    def _expire(self, today):
+        expired = False
+        cutoff = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for day in [day for day in self.segments if day < cutoff]:
+            logger.info(f"Removing odds history segment {day}")
+            segment = self.segments.pop(day)
+            segment.close()
+            self.rows -= len(segment)
+            shutil.rmtree(os.path.join(self.root, day), ignore_errors=True)
+            expired = True
+        if expired:
+            self._rebuild_last()
+
+    def _rebuild_last(self):
+        # The last recorded price per threshold, so unchanged prices aren't rewritten
+        self.last = {}
+        for segment in self.segments.values():
+            columns = segment.columns
+            for row in range(len(segment)):
+                last = self.last.setdefault((columns["fixture"][row], columns["market"][row]), {})
+                last[columns["threshold"][row]] = (columns["over"][row], columns["under"][row])
+
+    @staticmethod
+    def _same(previous, current):
+        if previous is None:
+            return False
+        return all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(previous, current))
+
+    def _load(self):
+        os.makedirs(self.root, exist_ok=True)
+        keys_path = os.path.join(self.root, KEYS_FILE)
+        try:
+            with open(keys_path, encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            content = ""
+        for line in content.splitlines():
+            try:
+                key = json.loads(line)
+            except ValueError:
+                # A torn write; keep the slot so later ids still line up
+                logger.error(f"Skipping corrupt odds history key: {line!r}")
+                key = None
+            else:
+                self.key_ids[key] = len(self.keys)
+            self.keys.append(key)
+        if content and not content.endswith("\n"):
+            with open(keys_path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+        for day in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, day)
+            if not os.path.isdir(path):
+                continue
+            segment = _Segment(path)
+            try:
+                segment.load()
+            except OSError as e:
+                logger.error(f"Could not load odds history segment {day}: {e}")
+                continue
+            self.segments[day] = segment
+            self.rows += len(segment)
+
+        self._rebuild_last()
+        if self.segments:
+            self._expire(_day(time.time()))
+        logger.info(f"Loaded {self.rows} odds history rows from {len(self.segments)} segments")
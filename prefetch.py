@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import threading
+import time
+
+from fixture_index import normalize_fixture
+
+logger = logging.getLogger(__name__)
+
+
+def parse_schedule(spec):
+    """Parse ``"lead:interval,..."`` (seconds) into ``[(lead, interval), ...]``, longest lead first.
+
+    A fixture whose kickoff is at least ``lead`` seconds away is refreshed every
+    ``interval`` seconds; the entry with the smallest lead also covers in-play.
+    """
+    schedule = []
+    for part in spec.split(","):
+        lead, interval = part.split(":")
+        schedule.append((float(lead), float(interval)))
+    return sorted(schedule, reverse=True)
+
+
+class WatchlistEntry:
+    def __init__(self, fixture, kickoff):
+        self.fixture = fixture
+        self.kickoff = kickoff
+        self.next_due = time.time()
+        self.last_refresh = None
+        self.refreshing = False
+        self.refreshes = 0
+        self.failures = 0
+
+    def to_dict(self):
+        return {
+            "fixture": self.fixture,
+            "kickoff": self.kickoff,
+            "next_refresh": self.next_due,
+            "last_refresh": self.last_refresh,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+class PrefetchScheduler:
+    """Keeps watchlisted fixtures scraped ahead of demand using spare pool capacity.
+
+    Each fixture is refreshed on ``schedule`` (more often as kickoff nears) and
+    dropped ``inplay_window`` seconds after kickoff. A refresh only starts while
+    a browser slot is idle and no lease is waiting for one, at most
+    ``concurrency`` at a time, and ``refresh`` is expected to lease at background
+    priority so live requests still go first. ``add``/``remove`` are
+    thread-safe; the scheduler runs on the pool loop.
+    """
+
+    def __init__(self, pool, refresh, schedule, concurrency=1, inplay_window=7200,
+                 retry_backoff=60, tick=1):
+        self.pool = pool
+        self.refresh = refresh  # async callable(fixture, interval) -> True on success
+        self.schedule = schedule
+        self.concurrency = concurrency
+        self.inplay_window = inplay_window
+        self.retry_backoff = retry_backoff
+        self.tick = tick
+        self.entries = {}  # normalized fixture -> WatchlistEntry
+        self.running = 0
+        self.skipped_busy = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    def add(self, fixture, kickoff):
+        """Watch a fixture, or update its kickoff if already watched."""
+        self._ensure_started()
+        with self._lock:
+            entry = self.entries.get(normalize_fixture(fixture))
+            if entry is None:
+                entry = self.entries[normalize_fixture(fixture)] = WatchlistEntry(fixture, kickoff)
+            else:
+                entry.kickoff = kickoff
+                entry.next_due = min(entry.next_due, time.time() + self.refresh_interval(kickoff))
+            return entry
+
+    def remove(self, fixture):
+        with self._lock:
+            return self.entries.pop(normalize_fixture(fixture), None) is not None
+
+    def watchlist(self):
+        with self._lock:
+            return sorted((entry.to_dict() for entry in self.entries.values()), key=lambda e: e["kickoff"])
+
+    def refresh_interval(self, kickoff, now=None):
+        lead = kickoff - (time.time() if now is None else now)
+        for min_lead, interval in self.schedule:
+            if lead >= min_lead:
+                return interval
+        return self.schedule[-1][1]
+
+    def stats(self):
+        with self._lock:
+            return {"fixtures": len(self.entries), "running": self.running, "skipped_busy": self.skipped_busy}
+
+    def _ensure_started(self):
+        self.pool.start()
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        asyncio.run_coroutine_threadsafe(self._run(), self.pool.loop)
+
+    def _has_idle_capacity(self):
+        stats = self.pool.stats()
+        return stats["idle"] > 0 and stats["waiting"] == 0
+
+    async def _run(self):
+        await self.pool.wait_ready()
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.time()
+            with self._lock:
+                for key in [k for k, e in self.entries.items() if now > e.kickoff + self.inplay_window]:
+                    logger.info(f"Prefetch: {self.entries[key].fixture} is past its in-play window, dropping")
+                    del self.entries[key]
+                due = sorted(
+                    (e for e in self.entries.values() if not e.refreshing and e.next_due <= now),
+                    key=lambda e: e.next_due,
+                )
+            for entry in due:
+                if self.running >= self.concurrency:
+                    break
+                if not self._has_idle_capacity():
+                    self.skipped_busy += 1
+                    break
+                entry.refreshing = True
+                self.running += 1
+                self.pool.loop.create_task(self._refresh(entry))
+
+    async def _refresh(self, entry):
+        interval = self.refresh_interval(entry.kickoff)
+        try:
+            ok = await self.refresh(entry.fixture, interval)
+        except Exception as e:
+            logger.error(f"Prefetch of {entry.fixture} failed: {e}")
+            ok = False
+        finally:
+            self.running -= 1
+            entry.refreshing = False
+
+        now = time.time()
+        entry.last_refresh = now
+        if ok:
+            entry.refreshes += 1
+            entry.failures = 0
+            entry.next_due = now + interval
+        else:
+            entry.failures += 1
+            entry.next_due = now + min(interval, self.retry_backoff * entry.failures)
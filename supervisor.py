@@ -0,0 +1,430 @@
+"""Run N scraper worker processes behind a fixture-affinity router.
+
+    python supervisor.py --workers 16 --port $PORT
+
+Each worker is a separate `hypercorn app:app` process with its own browser pool,
+profile directories, fixture index and caches. The router sends every request for
+a fixture to the same worker (consistent hashing on the normalized fixture), so
+that worker's warm pages and caches are reused. Workers that exit, or whose
+browsers have all died, are restarted.
+
+The router is a plain ASGI app talking HTTP/1.1 to the workers over asyncio
+streams, so it needs no thread per in-flight request: long scrapes and
+``/watch/<id>/events`` streams only cost an open connection each.
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from fixture_index import normalize_fixture
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Response headers that must not be copied from the worker's response
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "server", "date"}
+
+# Seconds to wait on a worker for each read; scrapes can be slow to start answering
+UPSTREAM_TIMEOUT = 600
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to worker indexes."""
+
+    def __init__(self, workers, replicas=64):
+        self.ring = sorted(
+            (self._hash(f"{worker}:{replica}"), worker)
+            for worker in range(workers)
+            for replica in range(replicas)
+        )
+        self.hashes = [h for h, _ in self.ring]
+
+    def get(self, key):
+        i = bisect.bisect(self.hashes, self._hash(key)) % len(self.ring)
+        return self.ring[i][1]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class WorkerProcess:
+    """One `hypercorn app:app` process with its own browser profile and state files."""
+
+    def __init__(self, index, port, state_dir):
+        self.index = index
+        self.port = port
+        self.state_dir = os.path.join(state_dir, f"worker-{index}")
+        self.process = None
+        self.started_at = 0
+        self.failures = 0
+        self.restarts = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        env = dict(os.environ)
+        env.update({
+            "WORKER_ID": str(self.index),
+            "BROWSER_DATA_DIR": os.path.join(self.state_dir, "browser_data"),
+            "FIXTURE_INDEX_PATH": os.path.join(self.state_dir, "fixture_index.json"),
+            "DEBUG_CAPTURE_DIR": os.path.join(self.state_dir, "debug_captures"),
+            "HISTORY_DIR": os.path.join(self.state_dir, "odds_history"),
+        })
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "hypercorn", "app:app", "--bind", f"127.0.0.1:{self.port}"],
+            cwd=HERE,
+            env=env,
+        )
+        self.started_at = time.time()
+        self.failures = 0
+        logger.info(f"Started worker {self.index} on port {self.port} (pid {self.process.pid})")
+
+    def stop(self, timeout=30):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def restart(self, reason):
+        logger.warning(f"Restarting worker {self.index}: {reason}")
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def check_health(self):
+        """Return None if healthy, otherwise a reason string."""
+        if self.process.poll() is not None:
+            return f"process exited with code {self.process.returncode}"
+        try:
+            with urllib.request.urlopen(f"{self.url}/healthz", timeout=5) as response:
+                response.read()
+            return None
+        except urllib.error.HTTPError as e:
+            return f"health check returned {e.code}"
+        except Exception as e:
+            return f"health check failed: {e}"
+
+
+class Supervisor:
+    """Starts the workers and restarts them when they die or stay unhealthy."""
+
+    def __init__(self, workers, base_port, state_dir, check_interval=10, max_failures=3, startup_grace=60):
+        self.workers = [WorkerProcess(i, base_port + i, state_dir) for i in range(workers)]
+        self.ring = HashRing(workers)
+        self.check_interval = check_interval
+        self.max_failures = max_failures
+        self.startup_grace = startup_grace
+        self._round_robin = itertools.cycle(range(workers))
+        self._stopping = threading.Event()
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        threading.Thread(target=self._monitor, name="supervisor-monitor", daemon=True).start()
+
+    def stop(self):
+        self._stopping.set()
+        for worker in self.workers:
+            worker.stop()
+
+    def worker_for_fixture(self, fixture):
+        return self.workers[self.ring.get(normalize_fixture(fixture))]
+
+    def any_worker(self):
+        return self.workers[next(self._round_robin)]
+
+    def _monitor(self):
+        while not self._stopping.wait(self.check_interval):
+            for worker in self.workers:
+                exited = worker.process.poll() is not None
+                if not exited and time.time() - worker.started_at < self.startup_grace:
+                    continue
+                reason = worker.check_health()
+                if reason is None:
+                    worker.failures = 0
+                    continue
+                worker.failures += 1
+                logger.warning(f"Worker {worker.index} unhealthy ({worker.failures}/{self.max_failures}): {reason}")
+                if exited or worker.failures >= self.max_failures:
+                    worker.restart(reason)
+
+
+class UpstreamResponse:
+    """A worker's response: status, headers, and the body read as it arrives."""
+
+    def __init__(self, status, headers, reader, writer, timeout):
+        self.status = status
+        self.headers = headers
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+
+    def header(self, name, default=""):
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return default
+
+    async def chunks(self):
+        # The connection is closed however iteration ends, including cancellation
+        try:
+            if self.header("transfer-encoding").lower() == "chunked":
+                while True:
+                    size = int((await self._read(self.reader.readline())).split(b";")[0], 16)
+                    if size == 0:
+                        break
+                    chunk = await self._read(self.reader.readexactly(size + 2))
+                    yield chunk[:-2]
+            else:
+                while True:
+                    chunk = await self._read(self.reader.read(65536))
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            self.close()
+
+    async def read(self):
+        return b"".join([chunk async for chunk in self.chunks()])
+
+    def close(self):
+        self.writer.close()
+
+    async def _read(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+
+async def request_worker(worker, method, target, body=b"", content_type=None, timeout=UPSTREAM_TIMEOUT):
+    """Send one HTTP/1.1 request to a worker and return its ``UpstreamResponse``.
+
+    ``timeout`` bounds the connect and each read, not the whole response, so
+    event streams with keepalives stay open.
+    """
+    reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", worker.port), 10)
+    try:
+        head = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: 127.0.0.1:{worker.port}",
+            "Connection: close",
+            f"Content-Length: {len(body)}",
+        ]
+        if content_type:
+            head.append(f"Content-Type: {content_type}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        status = int(status_line.split()[1])
+        headers = []
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers.append((name.strip(), value.strip()))
+    except BaseException:
+        writer.close()
+        raise
+    return UpstreamResponse(status, headers, reader, writer, timeout)
+
+
+class Router:
+    """ASGI app that forwards each request to the worker owning its fixture.
+
+    Proxying is async end to end, so a slow scrape or a long-lived event stream
+    holds an open connection rather than a server thread.
+    """
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        method = scope["method"]
+        parts = scope["path"].strip("/").split("/")
+        if method == "GET" and len(parts) == 1 and parts[0] in ("metrics", "stats", "watchlist", "healthz"):
+            return await getattr(self, parts[0])(send)
+
+        # Job and watch subscription ids are prefixed with the id of the worker that owns them
+        if (method == "GET" and len(parts) == 2 and parts[0] == "jobs") \
+                or (method == "DELETE" and len(parts) == 2 and parts[0] == "watch") \
+                or (method == "GET" and len(parts) == 3 and parts[0] == "watch" and parts[2] == "events"):
+            prefix = parts[1].split("-", 1)[0]
+            if not prefix.isdigit() or int(prefix) >= len(self.supervisor.workers):
+                return await _respond_json(send, {"error": "Unknown id"}, 404)
+            return await self.forward(self.supervisor.workers[int(prefix)], scope, body, receive, send)
+
+        if method not in ("GET", "POST", "DELETE"):
+            return await _respond_json(send, {"error": "Method not allowed"}, 405)
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        fixture = data.get('fixture') if isinstance(data, dict) else None
+        worker = self.supervisor.worker_for_fixture(fixture) if fixture else self.supervisor.any_worker()
+        return await self.forward(worker, scope, body, receive, send)
+
+    async def forward(self, worker, scope, body, receive, send):
+        target = (scope.get("raw_path") or scope["path"].encode()).decode("latin-1")
+        if scope["query_string"]:
+            target += "?" + scope["query_string"].decode("latin-1")
+        content_type = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1")
+        try:
+            response = await request_worker(worker, scope["method"], target, body, content_type)
+        except Exception as e:
+            return await _respond_json(send, {"error": f"Worker {worker.index} unavailable: {e}"}, 503)
+
+        headers = [
+            (k.lower().encode("latin-1"), v.encode("latin-1"))
+            for k, v in response.headers if k.lower() not in HOP_HEADERS
+        ]
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+
+        async def stream():
+            # Pass chunks on as they arrive so event streams go through unbuffered
+            async for chunk in response.chunks():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def client_gone():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        # Stop reading from the worker as soon as the client goes away
+        streaming = asyncio.ensure_future(stream())
+        disconnect = asyncio.ensure_future(client_gone())
+        await asyncio.wait({streaming, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        for task in (streaming, disconnect):
+            task.cancel()
+        response.close()
+        if streaming.done() and not streaming.cancelled() and streaming.exception():
+            logger.error(f"Proxying {target} from worker {worker.index} failed: {streaming.exception()}")
+
+    async def fetch_all(self, path):
+        async def fetch(worker):
+            try:
+                response = await request_worker(worker, "GET", path, timeout=10)
+                return worker.index, (await response.read()).decode("utf-8")
+            except Exception as e:
+                logger.error(f"Could not fetch {path} from worker {worker.index}: {e}")
+                return worker.index, None
+
+        results = await asyncio.gather(*(fetch(worker) for worker in self.supervisor.workers))
+        return {index: text for index, text in results if text is not None}
+
+    async def metrics(self, send):
+        # Merge worker metrics, tagging each sample with its worker
+        seen_headers = set()
+        lines = []
+        for index, text in (await self.fetch_all("/metrics")).items():
+            for line in text.splitlines():
+                if line.startswith("#"):
+                    if line not in seen_headers:
+                        seen_headers.add(line)
+                        lines.append(line)
+                elif line:
+                    lines.append(_add_label(line, "worker", index))
+        await _respond(send, 200, ("\n".join(lines) + "\n").encode("utf-8"), "text/plain; version=0.0.4")
+
+    async def stats(self, send):
+        workers = {}
+        for index, text in (await self.fetch_all("/stats")).items():
+            workers[index] = json.loads(text)
+        for worker in self.supervisor.workers:
+            workers.setdefault(worker.index, {})["restarts"] = worker.restarts
+        await _respond_json(send, {"workers": workers})
+
+    async def watchlist(self, send):
+        fixtures = []
+        for text in (await self.fetch_all("/watchlist")).values():
+            fixtures.extend(json.loads(text)["fixtures"])
+        await _respond_json(send, {"fixtures": sorted(fixtures, key=lambda entry: entry["kickoff"])})
+
+    async def healthz(self, send):
+        alive = sum(1 for worker in self.supervisor.workers if worker.process.poll() is None)
+        await _respond_json(send, {"workers": len(self.supervisor.workers), "running": alive}, 200 if alive else 503)
+
+
+async def _respond(send, status, body, content_type):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode("latin-1")), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _respond_json(send, data, status=200):
+    await _respond(send, status, json.dumps(data).encode("utf-8"), "application/json")
+
+
+def _add_label(sample, name, value):
+    metric, _, rest = sample.partition(" ")
+    label = f'{name}="{value}"'
+    if metric.endswith("}"):
+        metric = f"{metric[:-1]},{label}}}"
+    else:
+        metric = f"{metric}{{{label}}}"
+    return f"{metric} {rest}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--worker-base-port", type=int, default=9100)
+    parser.add_argument("--state-dir", default="./workers", help="per-worker profiles and state files")
+    args = parser.parse_args()
+
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    supervisor = Supervisor(args.workers, args.worker_base_port, args.state_dir)
+    supervisor.start()
+    hypercorn_config = Config()
+    hypercorn_config.bind = [f"0.0.0.0:{args.port}"]
+    try:
+        asyncio.run(serve(Router(supervisor), hypercorn_config, mode="asgi"))
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
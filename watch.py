@@ -0,0 +1,386 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from fixture_index import normalize_fixture
+from market_parser import market_table, pair_market_lines
+
+logger = logging.getLogger(__name__)
+
+# Name of the page function the market observer reports changes through
+BINDING = "__scrapeapiMarketsChanged"
+
+GRID_SELECTOR = "div.ipe-EventViewDetail_MarketGrid"
+
+
+def observer_script(extract_js):
+    """Page script that watches the market grid and reports changed pods.
+
+    ``extract_js`` is the pod extraction function (see ``app.EXTRACT_MARKETS_JS``).
+    Mutations inside the grid are debounced; each report re-extracts the pods and
+    sends only those whose text changed, plus the titles of pods that went away.
+    The first report carries every pod.
+    """
+    return """
+    (debounceMs) => {
+        const extract = %s;
+        const seen = new Map();  // pod title -> text last reported
+        let timer = null;
+        const report = () => {
+            timer = null;
+            const pods = [];
+            const titles = new Set();
+            for (const pod of extract({})) {
+                if (!pod.title || titles.has(pod.title)) continue;
+                titles.add(pod.title);
+                pods.push(pod);
+            }
+            const changed = pods.filter(pod => seen.get(pod.title) !== pod.text);
+            const removed = [...seen.keys()].filter(title => !titles.has(title));
+            changed.forEach(pod => seen.set(pod.title, pod.text));
+            removed.forEach(title => seen.delete(title));
+            if (changed.length || removed.length) window.%s(changed, removed);
+        };
+        const inGrid = node => {
+            const element = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+            return element && element.closest('%s');
+        };
+        // Observe the body so a re-rendered grid is still seen, but only react to
+        // mutations inside it
+        new MutationObserver(mutations => {
+            if (!timer && mutations.some(m => inGrid(m.target))) timer = setTimeout(report, debounceMs);
+        }).observe(document.body, {subtree: true, childList: true, characterData: true});
+        report();
+    }
+""" % (extract_js.strip(), BINDING, GRID_SELECTOR)
+
+
+class WatchLimitReached(Exception):
+    """Raised when subscribing or listening would go over the manager's limits."""
+
+
+class Subscription:
+    def __init__(self, session, tabs, buffer, id_prefix=""):
+        self.id = f"{id_prefix}{uuid.uuid4().hex}"
+        self.session = session
+        self.tabs = tabs
+        self.events = queue.Queue(buffer)
+        self.active = True
+        self.connected = 0
+        self.last_seen = time.time()
+
+    def to_dict(self):
+        return {
+            "subscription_id": self.id,
+            "fixture": self.session.fixture,
+            "tabs": self.tabs,
+            "status": self.session.status,
+        }
+
+
+class _Listener:
+    """Blocking iterator over a subscription's events that holds a listener slot until closed."""
+
+    def __init__(self, manager, subscription, keepalive):
+        self.manager = manager
+        self.subscription = subscription
+        self.keepalive = keepalive
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        subscription = self.subscription
+        if self.closed or (not subscription.active and subscription.events.empty()):
+            self.close()
+            raise StopIteration
+        try:
+            return subscription.events.get(timeout=self.keepalive)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.manager._release_listener(self.subscription)
+
+    # A stream dropped before it was ever read still gives its slot back
+    __del__ = close
+
+
+class WatchSession:
+    """One watched fixture: a pinned match page per tab and the latest markets seen."""
+
+    def __init__(self, fixture, tabs):
+        self.fixture = fixture
+        self.tabs = tabs
+        self.markets = {tab: {} for tab in tabs}  # tab -> {title: parsed_data}
+        self.ready_tabs = set()
+        self.subscriptions = {}
+        self.status = "starting"
+        self.updates = 0
+        self.failures = 0  # consecutive failed attempts to open the pages
+        self.stopped = asyncio.Event()
+
+
+class WatchManager:
+    """Keeps match pages open for watched fixtures and pushes market changes.
+
+    Each watched fixture holds one browser pool lease for as long as it has
+    subscribers, with a page per tab and a MutationObserver on its market grid.
+    Changed thresholds are pushed to every subscription's event queue, which the
+    HTTP layer drains (see ``listen``). ``subscribe``/``unsubscribe`` are
+    thread-safe; sessions run on the pool loop. Subscriptions with no listener for
+    ``idle_timeout`` seconds are dropped, and a fixture stops being watched with
+    its last subscription or after ``max_failures`` failed attempts in a row to
+    open its pages. Listening blocks a server thread for the life of the event
+    stream, so at most ``max_listeners`` streams may be open at once (None for no
+    limit). ``on_update`` is called with a tab's markets on every change
+    and again every few seconds while the page stays live, so consumers can keep
+    them fresh.
+    """
+
+    def __init__(self, pool, open_page, extract_js, tabs, max_fixtures, debounce_ms=250,
+                 idle_timeout=60, buffer=100, retry_backoff=10, max_failures=5, max_listeners=None,
+                 on_update=None, id_prefix=""):
+        self.pool = pool
+        self.open_page = open_page  # async callable(page, fixture, tab) -> error dict or None
+        self.observer_js = observer_script(extract_js)
+        self.tabs = tabs
+        self.max_fixtures = max_fixtures
+        self.debounce_ms = debounce_ms
+        self.idle_timeout = idle_timeout
+        self.buffer = buffer
+        self.retry_backoff = retry_backoff
+        self.max_failures = max_failures
+        self.max_listeners = max_listeners
+        self.listeners = 0
+        self.on_update = on_update  # callable(fixture, tab, {title: parsed_data}) on the pool loop
+        self.id_prefix = id_prefix
+        self.sessions = {}  # normalized fixture -> WatchSession
+        self.subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, fixture, tabs=None):
+        """Subscribe to a fixture's market changes, starting to watch it if needed.
+
+        Raises WatchLimitReached when the fixture is not yet watched and
+        ``max_fixtures`` fixtures already are.
+        """
+        self.pool.start()
+        key = normalize_fixture(fixture)
+        with self._lock:
+            session = self.sessions.get(key)
+            started = session is None
+            if started:
+                if len(self.sessions) >= self.max_fixtures:
+                    raise WatchLimitReached(f"Already watching {self.max_fixtures} fixtures")
+                session = self.sessions[key] = WatchSession(fixture, self.tabs)
+            subscription = Subscription(session, tabs or self.tabs, self.buffer, self.id_prefix)
+            session.subscriptions[subscription.id] = subscription
+            self.subscriptions[subscription.id] = subscription
+
+        if started:
+            logger.info(f"Watching {fixture}")
+            asyncio.run_coroutine_threadsafe(self._run(session), self.pool.loop)
+        else:
+            # Bring the new subscriber up to date with what is already known
+            self.pool.loop.call_soon_threadsafe(self._send_snapshot, subscription)
+        return subscription
+
+    def unsubscribe(self, subscription_id):
+        """Drop a subscription. Returns False if it is unknown."""
+        with self._lock:
+            subscription = self.subscriptions.pop(subscription_id, None)
+            if subscription is None:
+                return False
+            session = subscription.session
+            session.subscriptions.pop(subscription_id, None)
+            if not session.subscriptions:
+                self.sessions.pop(normalize_fixture(session.fixture), None)
+        self._close(subscription)
+        if not session.subscriptions:
+            logger.info(f"No subscribers left, no longer watching {session.fixture}")
+            self.pool.loop.call_soon_threadsafe(session.stopped.set)
+        return True
+
+    def get(self, subscription_id):
+        with self._lock:
+            return self.subscriptions.get(subscription_id)
+
+    def listen(self, subscription, keepalive):
+        """Iterate the subscription's events as they arrive, or None after ``keepalive`` idle seconds.
+
+        Raises WatchLimitReached when ``max_listeners`` streams are already open.
+        The iterator ends once the subscription is dropped; close it to free its
+        slot sooner.
+        """
+        with self._lock:
+            if self.max_listeners is not None and self.listeners >= self.max_listeners:
+                raise WatchLimitReached(f"Already streaming to {self.max_listeners} listeners")
+            self.listeners += 1
+            subscription.connected += 1
+        return _Listener(self, subscription, keepalive)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fixtures": {
+                    session.fixture: {
+                        "status": session.status,
+                        "failures": session.failures,
+                        "subscriptions": len(session.subscriptions),
+                        "updates": session.updates,
+                    }
+                    for session in self.sessions.values()
+                },
+                "subscriptions": len(self.subscriptions),
+                "listeners": self.listeners,
+            }
+
+    async def _run(self, session):
+        while not session.stopped.is_set():
+            try:
+                async with self.pool.lease() as context:
+                    await self._watch(session, context)
+            except Exception as e:
+                session.failures += 1
+                session.markets = {tab: {} for tab in session.tabs}
+                session.ready_tabs.clear()
+                self._publish(session, None, "error", {"fixture": session.fixture, "error": str(e)})
+                if session.failures >= self.max_failures:
+                    logger.error(f"Watch on {session.fixture} failed {session.failures} times, giving up: {e}")
+                    for subscription_id in list(session.subscriptions):
+                        self.unsubscribe(subscription_id)
+                    break
+                logger.error(f"Watch on {session.fixture} failed, retrying in {self.retry_backoff}s: {e}")
+                session.status = "retrying"
+                # Subscribers that went away while the page was down still expire
+                self._drop_idle(session)
+                try:
+                    await asyncio.wait_for(session.stopped.wait(), self.retry_backoff)
+                except asyncio.TimeoutError:
+                    pass
+        session.status = "stopped"
+
+    async def _watch(self, session, context):
+        pages = []
+        lost = []
+        try:
+            for tab in session.tabs:
+                page = await context.new_page()
+                pages.append(page)
+                page.on("close", lambda _, tab=tab: lost.append(f"{tab} page closed"))
+                page.on("crash", lambda _, tab=tab: lost.append(f"{tab} page crashed"))
+                await page.expose_function(
+                    BINDING, lambda changed, removed, tab=tab: self._on_change(session, tab, changed, removed)
+                )
+                error = await self.open_page(page, session.fixture, tab)
+                if error:
+                    raise RuntimeError(error["error"])
+                await page.evaluate(self.observer_js, self.debounce_ms)
+            session.status = "watching"
+            session.failures = 0
+
+            # Pages push changes through the binding; this loop only looks after them
+            while not session.stopped.is_set():
+                try:
+                    await asyncio.wait_for(session.stopped.wait(), 5)
+                except asyncio.TimeoutError:
+                    pass
+                if lost:
+                    raise RuntimeError(lost[0])
+                self._drop_idle(session)
+                # The pages are live, so unchanged markets are still current
+                if self.on_update:
+                    for tab in session.ready_tabs:
+                        self.on_update(session.fixture, tab, session.markets[tab])
+        finally:
+            for page in pages:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+    def _on_change(self, session, tab, changed, removed):
+        markets = session.markets[tab]
+        delta = {}
+        for pod in changed:
+            parsed_data = pair_market_lines(pod["thresholds"], pod["over"], pod["under"], pod["text"])
+            previous = markets.get(pod["title"], {})
+            updated = {t: prices for t, prices in parsed_data.items() if previous.get(t) != prices}
+            gone = sorted(t for t in previous if t not in parsed_data)
+            markets[pod["title"]] = parsed_data
+            if updated or gone:
+                delta[pod["title"]] = {"changed": market_table(updated), "removed": gone}
+        for title in removed:
+            delta[title] = {"changed": [], "removed": sorted(markets.pop(title, {}))}
+
+        session.updates += 1
+        if tab not in session.ready_tabs:
+            session.ready_tabs.add(tab)
+            for subscription in list(session.subscriptions.values()):
+                self._send_snapshot(subscription, [tab])
+        elif delta:
+            self._publish(session, tab, "delta", {"fixture": session.fixture, "tab": tab, "markets": delta})
+        if self.on_update:
+            self.on_update(session.fixture, tab, markets)
+
+    def _snapshot(self, session, tab):
+        return {
+            "fixture": session.fixture,
+            "tab": tab,
+            "markets": {title: market_table(parsed) for title, parsed in session.markets[tab].items()},
+        }
+
+    def _send_snapshot(self, subscription, tabs=None):
+        session = subscription.session
+        for tab in tabs or subscription.tabs:
+            if tab in subscription.tabs and tab in session.ready_tabs:
+                self._put(subscription, {"event": "snapshot", "data": self._snapshot(session, tab)})
+
+    def _publish(self, session, tab, event, data):
+        for subscription in list(session.subscriptions.values()):
+            if tab is None or tab in subscription.tabs:
+                self._put(subscription, {"event": event, "data": data})
+
+    def _put(self, subscription, event):
+        try:
+            subscription.events.put_nowait(event)
+        except queue.Full:
+            # The listener fell behind: drop the backlog and resend full snapshots,
+            # since later deltas would not apply to what it last saw
+            logger.warning(f"Subscription {subscription.id} fell behind, resending snapshot")
+            while not subscription.events.empty():
+                try:
+                    subscription.events.get_nowait()
+                except queue.Empty:
+                    break
+            session = subscription.session
+            for tab in subscription.tabs:
+                if tab in session.ready_tabs:
+                    subscription.events.put_nowait({"event": "snapshot", "data": self._snapshot(session, tab)})
+
+    def _release_listener(self, subscription):
+        with self._lock:
+            self.listeners -= 1
+            subscription.connected -= 1
+            subscription.last_seen = time.time()
+
+    def _drop_idle(self, session):
+        cutoff = time.time() - self.idle_timeout
+        for subscription in list(session.subscriptions.values()):
+            if not subscription.connected and subscription.last_seen < cutoff:
+                logger.info(f"Dropping idle watch subscription {subscription.id}")
+                self.unsubscribe(subscription.id)
+
+    def _close(self, subscription):
+        subscription.active = False
+        try:
+            subscription.events.put_nowait({"event": "end", "data": {"subscription_id": subscription.id}})
+        except queue.Full:
+            pass